@@ -8,206 +8,31 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime, timedelta
+import hashlib
+import inspect
 import json
 import os
 
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
-
-def create_output_dir():
-    os.makedirs('evaluation_output', exist_ok=True)
-
-def generate_data_sources_comparison():
-    """データソース比較グラフ"""
-    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-    fig.suptitle('FX Data Pipeline - Comprehensive Evaluation', fontsize=16, fontweight='bold')
-
-    # 1. データソース比較
-    ax1 = axes[0, 0]
-    sources = ['Yahoo\nFinance', 'OANDA\nAPI', 'FRED\nAPI']
-    coverage_years = [3, 10, 30]
-    api_required = [0, 1, 1]
-    cost = [0, 0, 0]
-
-    x = np.arange(len(sources))
-    width = 0.25
-
-    bars1 = ax1.bar(x - width, coverage_years, width, label='Coverage (years)', color='#3498db', alpha=0.8)
-    bars2 = ax1.bar(x, api_required, width, label='API Key Required', color='#e74c3c', alpha=0.8)
-    bars3 = ax1.bar(x + width, cost, width, label='Cost (JPY/month)', color='#2ecc71', alpha=0.8)
-
-    ax1.set_ylabel('Value', fontsize=12, fontweight='bold')
-    ax1.set_title('Data Source Comparison', fontsize=14, fontweight='bold')
-    ax1.set_xticks(x)
-    ax1.set_xticklabels(sources)
-    ax1.legend()
-    ax1.grid(axis='y', alpha=0.3)
-
-    # 2. 時間粒度サポート
-    ax2 = axes[0, 1]
-    granularities = ['M1', 'M5', 'M15', 'H1', 'H4', 'D']
-    yahoo_support = [0, 0, 0, 1, 0, 1]
-    oanda_support = [1, 1, 1, 1, 1, 1]
-
-    x = np.arange(len(granularities))
-    width = 0.35
-
-    bars1 = ax2.bar(x - width/2, yahoo_support, width, label='Yahoo Finance', color='#3498db', alpha=0.8)
-    bars2 = ax2.bar(x + width/2, oanda_support, width, label='OANDA API', color='#f39c12', alpha=0.8)
-
-    ax2.set_ylabel('Supported (1=Yes, 0=No)', fontsize=12, fontweight='bold')
-    ax2.set_title('Time Granularity Support', fontsize=14, fontweight='bold')
-    ax2.set_xticks(x)
-    ax2.set_xticklabels(granularities)
-    ax2.legend()
-    ax2.set_ylim([0, 1.2])
-    ax2.grid(axis='y', alpha=0.3)
-
-    # 3. データカバレッジ
-    ax3 = axes[1, 0]
-    years = ['2016', '2017', '2018', '2019', '2020', '2021', '2022', '2023', '2024', '2025']
-    yahoo_coverage = [100] * 10
-    oanda_coverage = [100] * 10
-    fred_coverage = [100] * 10
-
-    ax3.plot(years, yahoo_coverage, 'o-', linewidth=2.5, markersize=8, label='Yahoo Finance', color='#3498db')
-    ax3.plot(years, oanda_coverage, 's-', linewidth=2.5, markersize=8, label='OANDA API', color='#f39c12')
-    ax3.plot(years, fred_coverage, '^-', linewidth=2.5, markersize=8, label='FRED API', color='#2ecc71')
-
-    ax3.set_xlabel('Year', fontsize=12, fontweight='bold')
-    ax3.set_ylabel('Data Coverage (%)', fontsize=12, fontweight='bold')
-    ax3.set_title('Historical Data Coverage Timeline', fontsize=14, fontweight='bold')
-    ax3.legend()
-    ax3.grid(alpha=0.3)
-    ax3.set_ylim([95, 105])
-
-    # 4. 生成される特徴量の種類
-    ax4 = axes[1, 1]
-    feature_types = ['Technical\nIndicators', 'Price\nFeatures', 'Economic\nIndicators', 'Time\nSeries']
-    feature_counts = [60, 30, 15, 20]
-    colors = ['#3498db', '#2ecc71', '#f39c12', '#e74c3c']
-
-    bars = ax4.bar(feature_types, feature_counts, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
-    ax4.set_ylabel('Number of Features', fontsize=12, fontweight='bold')
-    ax4.set_title('Generated Features by Category (Total: 125)', fontsize=14, fontweight='bold')
-    ax4.grid(axis='y', alpha=0.3)
-
-    for bar, count in zip(bars, feature_counts):
-        height = bar.get_height()
-        ax4.text(bar.get_x() + bar.get_width()/2., height + 1,
-                f'{count}', ha='center', va='bottom', fontweight='bold', fontsize=11)
-
-    plt.tight_layout()
-    plt.savefig('evaluation_output/data_sources_analysis.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print("✅ Data sources analysis graph generated")
-
-def generate_pipeline_performance():
-    """パイプラインパフォーマンスグラフ"""
-    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-    fig.suptitle('Data Pipeline Performance Metrics', fontsize=16, fontweight='bold')
-
-    # 1. データ品質スコア
-    ax1 = axes[0]
-    metrics = ['Completeness', 'Accuracy', 'Consistency', 'Timeliness']
-    scores = [98.5, 99.2, 97.8, 99.5]
-    colors = ['#2ecc71', '#3498db', '#f39c12', '#e74c3c']
-
-    bars = ax1.barh(metrics, scores, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
-    ax1.set_xlabel('Quality Score (%)', fontsize=12, fontweight='bold')
-    ax1.set_title('Data Quality Metrics', fontsize=14, fontweight='bold')
-    ax1.set_xlim([95, 100])
-    ax1.grid(axis='x', alpha=0.3)
-    ax1.axvline(x=98, color='red', linestyle='--', linewidth=2, alpha=0.5, label='Target: 98%')
-    ax1.legend()
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-    for bar, score in zip(bars, scores):
-        width = bar.get_width()
-        ax1.text(width - 0.5, bar.get_y() + bar.get_height()/2.,
-                f'{score}%', ha='right', va='center', fontweight='bold', fontsize=11, color='white')
-
-    # 2. 処理速度
-    ax2 = axes[1]
-    tasks = ['Data\nFetch', 'Feature\nEngineering', 'Data\nValidation', 'Export\nCSV']
-    times = [2.5, 5.2, 1.8, 0.8]
-    colors = ['#3498db', '#2ecc71', '#f39c12', '#e74c3c']
-
-    bars = ax2.bar(tasks, times, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
-    ax2.set_ylabel('Processing Time (seconds)', fontsize=12, fontweight='bold')
-    ax2.set_title('Pipeline Processing Speed', fontsize=14, fontweight='bold')
-    ax2.grid(axis='y', alpha=0.3)
-
-    for bar, time in zip(bars, times):
-        height = bar.get_height()
-        ax2.text(bar.get_x() + bar.get_width()/2., height + 0.2,
-                f'{time}s', ha='center', va='bottom', fontweight='bold', fontsize=11)
-
-    total_time = sum(times)
-    ax2.text(0.5, 0.95, f'Total: {total_time}s',
-            transform=ax2.transAxes, ha='center', fontsize=12, fontweight='bold',
-            bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5))
-
-    plt.tight_layout()
-    plt.savefig('evaluation_output/pipeline_performance.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print("✅ Pipeline performance graph generated")
-
-def generate_summary_report():
-    """サマリーレポート生成"""
-    report = {
-        "evaluation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "pipeline_version": "1.0.0",
-        "data_sources": {
-            "yahoo_finance": {
-                "status": "operational",
-                "coverage": "3+ years",
-                "api_key_required": False,
-                "cost": "Free",
-                "granularities": ["H1", "D"]
-            },
-            "oanda_api": {
-                "status": "operational",
-                "coverage": "10 years",
-                "api_key_required": True,
-                "cost": "Free (demo)",
-                "granularities": ["M1", "M5", "M15", "H1", "H4", "D"]
-            },
-            "fred_api": {
-                "status": "operational",
-                "coverage": "30+ years",
-                "api_key_required": True,
-                "cost": "Free",
-                "data_types": ["interest_rates", "cpi", "unemployment"]
-            }
-        },
-        "features_generated": {
-            "total": 125,
-            "technical_indicators": 60,
-            "price_features": 30,
-            "economic_indicators": 15,
-            "time_series": 20
-        },
-        "performance_metrics": {
-            "data_completeness": 98.5,
-            "data_accuracy": 99.2,
-            "data_consistency": 97.8,
-            "data_timeliness": 99.5,
-            "avg_processing_time": 10.3
-        },
-        "supported_pairs": ["USD/JPY", "EUR/USD", "GBP/USD", "AUD/USD", "EUR/JPY"]
-    }
+plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+plt.rcParams['path.simplify'] = True
+plt.rcParams['agg.path.chunksize'] = 10000
 
-    with open('evaluation_output/pipeline_summary.json', 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
+# 点数の少ないカテゴリ/折れ線グラフなので画面表示相当の解像度で十分
+FIGURE_DPI = 120
 
-    print("✅ Pipeline summary generated")
-    return report
+# グラフ入力のハッシュ保存先（入力が変わらなければ再描画しない）
+FIGURE_CACHE_DIR = 'evaluation_output/.cache'
 
-def generate_markdown_report(summary):
-    """Markdownレポート生成"""
-    md = f"""# 📊 FX Data Pipeline - 総合評価レポート
+# Markdownレポートのテンプレート（{evaluation_date}等はsummaryの値で置換）
+_REPORT_TMPL = """# 📊 FX Data Pipeline - 総合評価レポート
 
-**評価日時**: {summary['evaluation_date']}
-**パイプラインバージョン**: {summary['pipeline_version']}
+**評価日時**: {evaluation_date}
+**パイプラインバージョン**: {pipeline_version}
 
 ---
 
@@ -381,14 +206,7 @@ Date,Close,SMA_7,SMA_25,RSI,MACD,BB_upper,BB_lower,...
 
 ### JSON形式
 
-```json
-{{
-  "date": "2024-01-01",
-  "price_data": {{...}},
-  "technical_indicators": {{...}},
-  "economic_indicators": {{...}}
-}}
-```
+{json_example}
 
 ---
 
@@ -443,6 +261,253 @@ Date,Close,SMA_7,SMA_25,RSI,MACD,BB_upper,BB_lower,...
 **評価結果**: **A（優秀）** - 本番運用推奨レベル
 """
 
+# テンプレート外に置くことで波括弧のエスケープを不要にする
+_REPORT_JSON_EXAMPLE = r"""```json
+{
+  "date": "2024-01-01",
+  "price_data": {...},
+  "technical_indicators": {...},
+  "economic_indicators": {...}
+}
+```"""
+
+def _dump_json(path, data: dict):
+    """JSON保存（orjsonがあれば使用、なければ標準json）"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+def _figure_hash(plot_func) -> str:
+    """グラフ入力のハッシュ（描画データは関数内の固定値なので関数ソース+dpiで決まる）"""
+    payload = json.dumps({'source': inspect.getsource(plot_func), 'dpi': FIGURE_DPI}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def _hash_file(output_file: str) -> str:
+    return os.path.join(FIGURE_CACHE_DIR, os.path.basename(output_file) + '.sha1')
+
+def _is_figure_cached(output_file: str, hash_key: str) -> bool:
+    """画像と同じ入力のハッシュが保存済みならTrue"""
+    hash_file = _hash_file(output_file)
+    if not (os.path.exists(output_file) and os.path.exists(hash_file)):
+        return False
+
+    with open(hash_file, encoding='utf-8') as f:
+        return f.read().strip() == hash_key
+
+def _save_figure_hash(output_file: str, hash_key: str):
+    os.makedirs(FIGURE_CACHE_DIR, exist_ok=True)
+    with open(_hash_file(output_file), 'w', encoding='utf-8') as f:
+        f.write(hash_key)
+
+def create_output_dir():
+    os.makedirs('evaluation_output', exist_ok=True)
+
+def generate_data_sources_comparison():
+    """データソース比較グラフ"""
+    output_file = 'evaluation_output/data_sources_analysis.png'
+    hash_key = _figure_hash(generate_data_sources_comparison)
+    if _is_figure_cached(output_file, hash_key):
+        print("✅ Data sources analysis graph up to date (skipped)")
+        return
+
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('FX Data Pipeline - Comprehensive Evaluation', fontsize=16, fontweight='bold')
+
+    # 1. データソース比較
+    ax1 = axes[0, 0]
+    sources = ['Yahoo\nFinance', 'OANDA\nAPI', 'FRED\nAPI']
+    coverage_years = [3, 10, 30]
+    api_required = [0, 1, 1]
+    cost = [0, 0, 0]
+
+    x = np.arange(len(sources))
+    width = 0.25
+
+    bars1 = ax1.bar(x - width, coverage_years, width, label='Coverage (years)', color='#3498db', alpha=0.8)
+    bars2 = ax1.bar(x, api_required, width, label='API Key Required', color='#e74c3c', alpha=0.8)
+    bars3 = ax1.bar(x + width, cost, width, label='Cost (JPY/month)', color='#2ecc71', alpha=0.8)
+
+    ax1.set_ylabel('Value', fontsize=12, fontweight='bold')
+    ax1.set_title('Data Source Comparison', fontsize=14, fontweight='bold')
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(sources)
+    ax1.legend()
+    ax1.grid(axis='y', alpha=0.3)
+
+    # 2. 時間粒度サポート
+    ax2 = axes[0, 1]
+    granularities = ['M1', 'M5', 'M15', 'H1', 'H4', 'D']
+    yahoo_support = [0, 0, 0, 1, 0, 1]
+    oanda_support = [1, 1, 1, 1, 1, 1]
+
+    x = np.arange(len(granularities))
+    width = 0.35
+
+    bars1 = ax2.bar(x - width/2, yahoo_support, width, label='Yahoo Finance', color='#3498db', alpha=0.8)
+    bars2 = ax2.bar(x + width/2, oanda_support, width, label='OANDA API', color='#f39c12', alpha=0.8)
+
+    ax2.set_ylabel('Supported (1=Yes, 0=No)', fontsize=12, fontweight='bold')
+    ax2.set_title('Time Granularity Support', fontsize=14, fontweight='bold')
+    ax2.set_xticks(x)
+    ax2.set_xticklabels(granularities)
+    ax2.legend()
+    ax2.set_ylim([0, 1.2])
+    ax2.grid(axis='y', alpha=0.3)
+
+    # 3. データカバレッジ
+    ax3 = axes[1, 0]
+    years = ['2016', '2017', '2018', '2019', '2020', '2021', '2022', '2023', '2024', '2025']
+    yahoo_coverage = [100] * 10
+    oanda_coverage = [100] * 10
+    fred_coverage = [100] * 10
+
+    ax3.plot(years, yahoo_coverage, 'o-', linewidth=2.5, markersize=8, label='Yahoo Finance', color='#3498db')
+    ax3.plot(years, oanda_coverage, 's-', linewidth=2.5, markersize=8, label='OANDA API', color='#f39c12')
+    ax3.plot(years, fred_coverage, '^-', linewidth=2.5, markersize=8, label='FRED API', color='#2ecc71')
+
+    ax3.set_xlabel('Year', fontsize=12, fontweight='bold')
+    ax3.set_ylabel('Data Coverage (%)', fontsize=12, fontweight='bold')
+    ax3.set_title('Historical Data Coverage Timeline', fontsize=14, fontweight='bold')
+    ax3.legend()
+    ax3.grid(alpha=0.3)
+    ax3.set_ylim([95, 105])
+
+    # 4. 生成される特徴量の種類
+    ax4 = axes[1, 1]
+    feature_types = ['Technical\nIndicators', 'Price\nFeatures', 'Economic\nIndicators', 'Time\nSeries']
+    feature_counts = [60, 30, 15, 20]
+    colors = ['#3498db', '#2ecc71', '#f39c12', '#e74c3c']
+
+    bars = ax4.bar(feature_types, feature_counts, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
+    ax4.set_ylabel('Number of Features', fontsize=12, fontweight='bold')
+    ax4.set_title('Generated Features by Category (Total: 125)', fontsize=14, fontweight='bold')
+    ax4.grid(axis='y', alpha=0.3)
+
+    for bar, count in zip(bars, feature_counts):
+        height = bar.get_height()
+        ax4.text(bar.get_x() + bar.get_width()/2., height + 1,
+                f'{count}', ha='center', va='bottom', fontweight='bold', fontsize=11)
+
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=FIGURE_DPI, bbox_inches='tight')
+    plt.close(fig)
+    _save_figure_hash(output_file, hash_key)
+    print("✅ Data sources analysis graph generated")
+
+def generate_pipeline_performance():
+    """パイプラインパフォーマンスグラフ"""
+    output_file = 'evaluation_output/pipeline_performance.png'
+    hash_key = _figure_hash(generate_pipeline_performance)
+    if _is_figure_cached(output_file, hash_key):
+        print("✅ Pipeline performance graph up to date (skipped)")
+        return
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    fig.suptitle('Data Pipeline Performance Metrics', fontsize=16, fontweight='bold')
+
+    # 1. データ品質スコア
+    ax1 = axes[0]
+    metrics = ['Completeness', 'Accuracy', 'Consistency', 'Timeliness']
+    scores = [98.5, 99.2, 97.8, 99.5]
+    colors = ['#2ecc71', '#3498db', '#f39c12', '#e74c3c']
+
+    bars = ax1.barh(metrics, scores, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
+    ax1.set_xlabel('Quality Score (%)', fontsize=12, fontweight='bold')
+    ax1.set_title('Data Quality Metrics', fontsize=14, fontweight='bold')
+    ax1.set_xlim([95, 100])
+    ax1.grid(axis='x', alpha=0.3)
+    ax1.axvline(x=98, color='red', linestyle='--', linewidth=2, alpha=0.5, label='Target: 98%')
+    ax1.legend()
+
+    for bar, score in zip(bars, scores):
+        width = bar.get_width()
+        ax1.text(width - 0.5, bar.get_y() + bar.get_height()/2.,
+                f'{score}%', ha='right', va='center', fontweight='bold', fontsize=11, color='white')
+
+    # 2. 処理速度
+    ax2 = axes[1]
+    tasks = ['Data\nFetch', 'Feature\nEngineering', 'Data\nValidation', 'Export\nCSV']
+    times = [2.5, 5.2, 1.8, 0.8]
+    colors = ['#3498db', '#2ecc71', '#f39c12', '#e74c3c']
+
+    bars = ax2.bar(tasks, times, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
+    ax2.set_ylabel('Processing Time (seconds)', fontsize=12, fontweight='bold')
+    ax2.set_title('Pipeline Processing Speed', fontsize=14, fontweight='bold')
+    ax2.grid(axis='y', alpha=0.3)
+
+    for bar, time in zip(bars, times):
+        height = bar.get_height()
+        ax2.text(bar.get_x() + bar.get_width()/2., height + 0.2,
+                f'{time}s', ha='center', va='bottom', fontweight='bold', fontsize=11)
+
+    total_time = sum(times)
+    ax2.text(0.5, 0.95, f'Total: {total_time}s',
+            transform=ax2.transAxes, ha='center', fontsize=12, fontweight='bold',
+            bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5))
+
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=FIGURE_DPI, bbox_inches='tight')
+    plt.close(fig)
+    _save_figure_hash(output_file, hash_key)
+    print("✅ Pipeline performance graph generated")
+
+def generate_summary_report():
+    """サマリーレポート生成"""
+    report = {
+        "evaluation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "pipeline_version": "1.0.0",
+        "data_sources": {
+            "yahoo_finance": {
+                "status": "operational",
+                "coverage": "3+ years",
+                "api_key_required": False,
+                "cost": "Free",
+                "granularities": ["H1", "D"]
+            },
+            "oanda_api": {
+                "status": "operational",
+                "coverage": "10 years",
+                "api_key_required": True,
+                "cost": "Free (demo)",
+                "granularities": ["M1", "M5", "M15", "H1", "H4", "D"]
+            },
+            "fred_api": {
+                "status": "operational",
+                "coverage": "30+ years",
+                "api_key_required": True,
+                "cost": "Free",
+                "data_types": ["interest_rates", "cpi", "unemployment"]
+            }
+        },
+        "features_generated": {
+            "total": 125,
+            "technical_indicators": 60,
+            "price_features": 30,
+            "economic_indicators": 15,
+            "time_series": 20
+        },
+        "performance_metrics": {
+            "data_completeness": 98.5,
+            "data_accuracy": 99.2,
+            "data_consistency": 97.8,
+            "data_timeliness": 99.5,
+            "avg_processing_time": 10.3
+        },
+        "supported_pairs": ["USD/JPY", "EUR/USD", "GBP/USD", "AUD/USD", "EUR/JPY"]
+    }
+
+    _dump_json('evaluation_output/pipeline_summary.json', report)
+
+    print("✅ Pipeline summary generated")
+    return report
+
+def generate_markdown_report(summary):
+    """Markdownレポート生成"""
+    md = _REPORT_TMPL.format_map({**summary, 'json_example': _REPORT_JSON_EXAMPLE})
+
     with open('evaluation_output/EVALUATION_REPORT.md', 'w', encoding='utf-8') as f:
         f.write(md)
 
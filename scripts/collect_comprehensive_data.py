@@ -18,6 +18,9 @@ from loguru import logger
 import time
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional
 import os
 
@@ -25,7 +28,111 @@ from oandapyV20 import API
 from oandapyV20.endpoints import instruments
 from oandapyV20.exceptions import V20Error
 
+try:
+    import talib
+except ImportError:
+    talib = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from src.config import settings
+from src.tools import FileCache, RateLimiter, wilder_mean
+
+# 価格カラム → OANDA candle JSON内の位置 (価格種別, キー)
+CANDLE_FIELDS = {
+    'open': ('mid', 'o'),
+    'high': ('mid', 'h'),
+    'low': ('mid', 'l'),
+    'close': ('mid', 'c'),
+    'bid_close': ('bid', 'c'),
+    'ask_close': ('ask', 'c'),
+}
+
+CANDLE_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume', 'bid_close', 'ask_close', 'spread']
+
+# 保存時の型（提示桁数: JPYペア3桁・その他5桁はfloat32で表現できる、出来高はint32に収まる）
+PRICE_DTYPES = {
+    'open': 'float32',
+    'high': 'float32',
+    'low': 'float32',
+    'close': 'float32',
+    'volume': 'int32',
+    'bid_close': 'float32',
+    'ask_close': 'float32',
+    'spread': 'float32',
+}
+
+# 中間ファイルはParquet（列指向・型付き・zstd圧縮）で保存
+PARQUET_OPTIONS = {
+    'engine': 'pyarrow',
+    'compression': 'zstd',
+    'row_group_size': 200_000,
+}
+
+# センチメント特徴量の生成に使う価格カラム
+SENTIMENT_INPUT_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'spread']
+
+# ML用ターゲットの予測ホライズン（列名ラベル → 時間足の本数）
+TARGET_HORIZONS = {'1h': 1, '4h': 4, '1d': 24}
+
+# キャッシュ有効期限（秒）
+FRED_CACHE_TTL = 90 * 24 * 3600
+OANDA_RECENT_TTL = 3600
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """配列をperiods分だけずらす（正: 過去の値、負: 未来の値。はみ出した部分はNaN）"""
+    shifted = np.full(values.shape, np.nan)
+    if periods > 0:
+        shifted[periods:] = values[:-periods]
+    elif periods < 0:
+        shifted[:periods] = values[-periods:]
+    else:
+        shifted[:] = values
+    return shifted
+
+
+def _candles_to_frame(candles: list) -> pd.DataFrame:
+    """
+    ローソク足のリストを列ごとの配列（件数分を事前確保）に変換してDataFrame化
+
+    価格はfloat64で読み込みスプレッドを計算した後、保存用の型（PRICE_DTYPES）に変換する
+    """
+    n = len(candles)
+    prices = {
+        column: np.fromiter(
+            (float(c.get(price, {}).get(key, 'nan')) for c in candles),
+            dtype=np.float64,
+            count=n
+        )
+        for column, (price, key) in CANDLE_FIELDS.items()
+    }
+
+    columns = {
+        'time': [c['time'] for c in candles],
+        'volume': np.fromiter((c.get('volume', 0) for c in candles), dtype=PRICE_DTYPES['volume'], count=n),
+    }
+    columns.update({column: values.astype(PRICE_DTYPES[column]) for column, values in prices.items()})
+    # float64で差を取り、中間配列を作らず保存用の配列へ直接書き込む
+    columns['spread'] = np.subtract(
+        prices['ask_close'], prices['bid_close'],
+        out=np.empty(n, dtype=PRICE_DTYPES['spread']), casting='same_kind'
+    )
+
+    return pd.DataFrame(columns, columns=CANDLE_COLUMNS, copy=False)
+
+
+def _dump_json(path: Path, data: dict):
+    """JSON保存（orjsonがあれば使用、なければ標準json）"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
 
 
 class ComprehensiveDataCollector:
@@ -48,17 +155,41 @@ class ComprehensiveDataCollector:
             "USD_CAD", "AUD_JPY", "CHF_JPY", "EUR_GBP"
         ]
 
+        # 並列取得時もAPI全体のリクエスト間隔を守る
+        self._oanda_limiter = RateLimiter(0.2)
+
         # FRED API
         self.fred_api_key = os.getenv('FRED_API_KEY')
+        self._fred_limiter = RateLimiter(0.3)
+
+        # 全系列で接続を使い回す（keep-alive・gzip・自動リトライ）
+        self._fred_session = requests.Session()
+        self._fred_session.headers.update({'Accept-Encoding': 'gzip'})
+        self._fred_session.mount('https://', HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        ))
+
+        # APIレスポンスキャッシュ（再実行時のダウンロード削減）
+        self._oanda_cache = FileCache("oanda")
+        self._fred_cache = FileCache("fred")
 
         logger.info("ComprehensiveDataCollector 初期化完了")
 
     # ===== 1. 価格データ収集（完全履歴） =====
 
-    def collect_full_price_history(self, start_year: int = 2015, end_year: int = 2024):
+    def collect_full_price_history(self, start_year: int = 2015, end_year: int = 2024, force_refresh: bool = False):
         """
         完全な履歴価格データを収集
         日付範囲を指定して取得
+
+        Args:
+            force_refresh: Trueならキャッシュを無視して再取得
         """
         logger.info("="*70)
         logger.info("1. 価格データ収集（完全履歴）")
@@ -67,90 +198,138 @@ class ComprehensiveDataCollector:
         price_dir = self.output_dir / "price_data"
         price_dir.mkdir(exist_ok=True)
 
-        for instrument in self.instruments:
-            logger.info(f"\n{instrument} のデータ収集中...")
+        # I/O待ちが支配的なので通貨ペア単位で並列取得（QPSはself._oanda_limiterで制御）
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            futures = {
+                executor.submit(self._fetch_instrument, instrument, start_year, end_year, force_refresh): instrument
+                for instrument in self.instruments
+            }
 
-            try:
-                all_data = []
-
-                # 月単位で取得（API制限対策）
-                current_date = datetime(start_year, 1, 1)
-                end_date = datetime(end_year, 12, 31)
-
-                while current_date < end_date:
-                    next_date = current_date + timedelta(days=180)  # 6ヶ月ずつ
-                    if next_date > end_date:
-                        next_date = end_date
-
-                    logger.info(f"  {current_date.strftime('%Y-%m')} ~ {next_date.strftime('%Y-%m')}...")
-
-                    try:
-                        params = {
-                            "granularity": "H1",
-                            "from": current_date.strftime("%Y-%m-%dT00:00:00Z"),
-                            "to": next_date.strftime("%Y-%m-%dT23:59:59Z"),
-                            "price": "MBA"
-                        }
-
-                        endpoint = instruments.InstrumentsCandles(
-                            instrument=instrument,
-                            params=params
-                        )
-                        response = self.oanda.request(endpoint)
-
-                        candles = response.get('candles', [])
-
-                        for candle in candles:
-                            if candle.get('complete', False):
-                                mid = candle.get('mid', {})
-                                bid = candle.get('bid', {})
-                                ask = candle.get('ask', {})
-
-                                all_data.append({
-                                    'time': candle['time'],
-                                    'open': float(mid.get('o', 0)),
-                                    'high': float(mid.get('h', 0)),
-                                    'low': float(mid.get('l', 0)),
-                                    'close': float(mid.get('c', 0)),
-                                    'volume': int(candle.get('volume', 0)),
-                                    'bid_close': float(bid.get('c', 0)) if bid else 0,
-                                    'ask_close': float(ask.get('c', 0)) if ask else 0,
-                                })
-
-                        logger.info(f"    取得: {len(candles)}件")
-
-                    except V20Error as e:
-                        logger.warning(f"    API エラー: {e}")
-
-                    time.sleep(0.5)  # API制限
-                    current_date = next_date
-
-                # データフレーム化・保存
-                if all_data:
-                    df = pd.DataFrame(all_data)
-                    df['time'] = pd.to_datetime(df['time'])
-                    df = df.drop_duplicates(subset=['time']).sort_values('time')
-                    df.set_index('time', inplace=True)
-
-                    # スプレッド計算
-                    df['spread'] = df['ask_close'] - df['bid_close']
-
-                    output_file = price_dir / f"{instrument}_full_history.csv"
-                    df.to_csv(output_file)
-
-                    logger.info(f"{instrument} 完了: {len(df)}件 ({df.index.min()} ~ {df.index.max()})")
+            for future in as_completed(futures):
+                instrument = futures[future]
 
-            except Exception as e:
-                logger.error(f"{instrument} エラー: {e}")
-                continue
+                try:
+                    df = future.result()
+
+                    # データフレーム化・保存
+                    if df is not None:
+                        output_file = price_dir / f"{instrument}_full_history.parquet"
+                        df.to_parquet(output_file, **PARQUET_OPTIONS)
+
+                        logger.info(f"{instrument} 完了: {len(df)}件 ({df.index.min()} ~ {df.index.max()})")
+
+                except Exception as e:
+                    logger.error(f"{instrument} エラー: {e}")
+                    continue
 
         logger.info("\n価格データ収集完了!")
 
+    def _fetch_instrument(
+        self,
+        instrument: str,
+        start_year: int,
+        end_year: int,
+        force_refresh: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        1通貨ペア分の履歴をOANDAから取得
+
+        Returns:
+            time をインデックスとするDataFrame（データなしの場合はNone）
+        """
+        logger.info(f"\n{instrument} のデータ収集中...")
+
+        batches = []
+        last_time = None
+
+        # 月単位で取得（API制限対策）
+        current_date = datetime(start_year, 1, 1)
+        end_date = datetime(end_year, 12, 31)
+
+        while current_date < end_date:
+            next_date = current_date + timedelta(days=180)  # 6ヶ月ずつ
+            if next_date > end_date:
+                next_date = end_date
+
+            logger.info(f"  {instrument} {current_date.strftime('%Y-%m')} ~ {next_date.strftime('%Y-%m')}...")
+
+            try:
+                params = {
+                    "granularity": "H1",
+                    "from": current_date.strftime("%Y-%m-%dT00:00:00Z"),
+                    "to": next_date.strftime("%Y-%m-%dT23:59:59Z"),
+                    "price": "MBA"
+                }
+
+                response = self._cached_oanda(instrument, params, force_refresh)
+
+                candles = response.get('candles', ())
+                complete = [c for c in candles if c.get('complete', False)]
+
+                # ローソク足ごとのdictを作らず、バッチ単位で列指向に変換
+                if complete:
+                    batch = _candles_to_frame(complete)
+
+                    # 期間の境界（前バッチの最終日と重複）を除外
+                    # OANDAの応答は時刻順で時刻文字列も同一書式なので文字列比較でよい
+                    if last_time is not None:
+                        batch = batch[batch['time'] > last_time]
+
+                    if not batch.empty:
+                        batches.append(batch)
+                        last_time = batch['time'].iloc[-1]
+
+                logger.info(f"    {instrument} 取得: {len(candles)}件")
+
+            except V20Error as e:
+                logger.warning(f"    {instrument} API エラー: {e}")
+
+            current_date = next_date
+
+        if not batches:
+            return None
+
+        # 各バッチは時刻順・重複なしなので結合結果もソート済み
+        df = pd.concat(batches, ignore_index=True)
+        # OANDAはRFC3339（ナノ秒・Z付き）で返すのでISO8601の高速パスで一括変換
+        df['time'] = pd.to_datetime(df['time'], format='ISO8601', utc=True)
+        df.set_index('time', inplace=True)
+
+        return df
+
+    def _cached_oanda(self, instrument: str, params: dict, force_refresh: bool = False) -> dict:
+        """
+        キャッシュ経由でローソク足を取得
+
+        7日以上前で終わる期間は確定済みなので無期限にキャッシュする
+        """
+        key = f"instruments/{instrument}/candles"
+        to_time = datetime.strptime(params['to'], "%Y-%m-%dT%H:%M:%SZ")
+        ttl = None if to_time < datetime.now() - timedelta(days=7) else OANDA_RECENT_TTL
+
+        if not force_refresh:
+            cached = self._oanda_cache.get(key, params, ttl=ttl)
+            if cached is not None:
+                return cached
+
+        endpoint = instruments.InstrumentsCandles(
+            instrument=instrument,
+            params=params
+        )
+        self._oanda_limiter.wait()  # API制限
+        response = self.oanda.request(endpoint)
+
+        self._oanda_cache.set(key, params, response)
+        return response
+
     # ===== 2. 経済指標データ収集（FRED API） =====
 
-    def collect_economic_indicators(self, start_date: str = "2015-01-01"):
+    def collect_economic_indicators(self, start_date: str = "2015-01-01", force_refresh: bool = False):
         """
         FRED APIから経済指標を収集
+
+        Args:
+            force_refresh: Trueならキャッシュを無視して再取得
         """
         logger.info("\n" + "="*70)
         logger.info("2. 経済指標データ収集（FRED API）")
@@ -197,47 +376,20 @@ class ComprehensiveDataCollector:
 
         all_data = {}
 
-        for series_id, name in indicators.items():
-            logger.info(f"  {name} ({series_id}) 取得中...")
+        # 系列ごとに独立したリクエストなので並列取得
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                executor.submit(self._fetch_fred_series, series_id, name, start_date, force_refresh): name
+                for series_id, name in indicators.items()
+            }
 
-            try:
-                url = f"https://api.stlouisfed.org/fred/series/observations"
-                params = {
-                    'series_id': series_id,
-                    'api_key': self.fred_api_key,
-                    'file_type': 'json',
-                    'observation_start': start_date,
-                }
+            for future in as_completed(futures):
+                series = future.result()
+                if series is not None:
+                    all_data[futures[future]] = series
 
-                response = requests.get(url, params=params)
-                data = response.json()
-
-                if 'observations' in data:
-                    observations = data['observations']
-                    series_data = []
-
-                    for obs in observations:
-                        try:
-                            value = float(obs['value']) if obs['value'] != '.' else np.nan
-                            series_data.append({
-                                'date': obs['date'],
-                                'value': value
-                            })
-                        except:
-                            continue
-
-                    if series_data:
-                        df = pd.DataFrame(series_data)
-                        df['date'] = pd.to_datetime(df['date'])
-                        df.set_index('date', inplace=True)
-                        all_data[name] = df['value']
-                        logger.info(f"    成功: {len(df)}件")
-
-                time.sleep(0.3)  # API制限
-
-            except Exception as e:
-                logger.error(f"    エラー: {e}")
-                continue
+        # 列順を指標リストの順に揃える
+        all_data = {name: all_data[name] for name in indicators.values() if name in all_data}
 
         # 統合データフレーム作成
         if all_data:
@@ -247,20 +399,80 @@ class ComprehensiveDataCollector:
             # 欠損値を前方補完
             combined = combined.ffill()
 
-            # 追加特徴量
+            # 追加特徴量（まとめて一度に追加）
+            derived = {}
             if 'us_10y_treasury' in combined.columns and 'us_2y_treasury' in combined.columns:
-                combined['yield_curve'] = combined['us_10y_treasury'] - combined['us_2y_treasury']
+                derived['yield_curve'] = combined['us_10y_treasury'] - combined['us_2y_treasury']
 
             if 'us_fed_funds_rate' in combined.columns and 'jp_long_term_rate' in combined.columns:
-                combined['us_jp_rate_diff'] = combined['us_fed_funds_rate'] - combined['jp_long_term_rate']
+                derived['us_jp_rate_diff'] = combined['us_fed_funds_rate'] - combined['jp_long_term_rate']
 
-            output_file = econ_dir / "all_indicators.csv"
-            combined.to_csv(output_file)
+            combined = combined.assign(**derived)
+
+            output_file = econ_dir / "all_indicators.parquet"
+            combined.to_parquet(output_file, **PARQUET_OPTIONS)
 
             logger.info(f"\n経済指標データ保存: {output_file}")
             logger.info(f"  期間: {combined.index.min()} ~ {combined.index.max()}")
             logger.info(f"  指標数: {len(combined.columns)}")
 
+    def _fetch_fred_series(
+        self,
+        series_id: str,
+        name: str,
+        start_date: str,
+        force_refresh: bool = False
+    ) -> Optional[pd.Series]:
+        """
+        FREDから1系列を取得
+
+        Returns:
+            date をインデックスとする値のSeries（取得失敗時はNone）
+        """
+        logger.info(f"  {name} ({series_id}) 取得中...")
+
+        try:
+            params = {
+                'series_id': series_id,
+                'file_type': 'json',
+                'observation_start': start_date,
+            }
+
+            data = self._cached_fred(params, force_refresh)
+
+            if data.get('observations'):
+                obs_df = pd.DataFrame(data['observations'], columns=['date', 'value'])
+
+                # 欠損値は '.' で返るため数値変換時にNaNにする
+                obs_df['value'] = pd.to_numeric(obs_df['value'], errors='coerce')
+                obs_df['date'] = pd.to_datetime(obs_df['date'], format='%Y-%m-%d', cache=True)
+
+                logger.info(f"    {name} 成功: {len(obs_df)}件")
+                return obs_df.set_index('date')['value']
+
+        except Exception as e:
+            logger.error(f"    {name} エラー: {e}")
+
+        return None
+
+    def _cached_fred(self, params: dict, force_refresh: bool = False) -> dict:
+        """キャッシュ経由でFREDの系列データを取得（APIキーはキャッシュキーに含めない）"""
+        url = "https://api.stlouisfed.org/fred/series/observations"
+
+        if not force_refresh:
+            cached = self._fred_cache.get(url, params, ttl=FRED_CACHE_TTL)
+            if cached is not None:
+                return cached
+
+        self._fred_limiter.wait()  # API制限
+        response = self._fred_session.get(url, params={**params, 'api_key': self.fred_api_key})
+        data = response.json()
+
+        if 'observations' in data:
+            self._fred_cache.set(url, params, data)
+
+        return data
+
     # ===== 3. ニュース/センチメントデータ =====
 
     def collect_sentiment_data(self):
@@ -283,58 +495,74 @@ class ComprehensiveDataCollector:
 
         price_dir = self.output_dir / "price_data"
 
-        for csv_file in price_dir.glob("*.csv"):
-            instrument = csv_file.stem.replace("_full_history", "")
+        for price_file in price_dir.glob("*_full_history.parquet"):
+            instrument = price_file.stem.replace("_full_history", "")
             logger.info(f"  {instrument} のセンチメント特徴量生成中...")
 
             try:
-                df = pd.read_csv(csv_file, index_col='time', parse_dates=True)
+                df = pd.read_parquet(price_file, columns=SENTIMENT_INPUT_COLUMNS)
+
+                close = df['close'].to_numpy(dtype=np.float64)
+                high = df['high'].to_numpy(dtype=np.float64)
+                low = df['low'].to_numpy(dtype=np.float64)
+                volume = df['volume'].to_numpy(dtype=np.float64)
+
+                # 前足終値・リターンは全指標で共有（1回だけ計算）
+                prev_close = _shift(close, 1)
+                returns = pd.Series(close / prev_close - 1, index=df.index)
 
                 # テクニカルベースのセンチメント指標
-                sentiment_features = pd.DataFrame(index=df.index)
+                features = {}
 
                 # 1. ボラティリティ（恐怖指標）
-                sentiment_features['volatility_20'] = df['close'].pct_change().rolling(20).std() * np.sqrt(252)
-                sentiment_features['volatility_60'] = df['close'].pct_change().rolling(60).std() * np.sqrt(252)
+                features['volatility_20'] = returns.rolling(20).std().to_numpy() * np.sqrt(252)
+                features['volatility_60'] = returns.rolling(60).std().to_numpy() * np.sqrt(252)
 
-                # 2. トレンド強度（ADX的な指標）
-                high_low = df['high'] - df['low']
-                high_close = abs(df['high'] - df['close'].shift(1))
-                low_close = abs(df['low'] - df['close'].shift(1))
-                true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-                sentiment_features['atr_14'] = true_range.rolling(14).mean()
+                # 2. トレンド強度（ADX的な指標）- Wilder平滑化ATR
+                if talib is not None:
+                    features['atr_14'] = talib.ATR(high, low, close, timeperiod=14)
+                else:
+                    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+                    features['atr_14'] = wilder_mean(true_range, 14)
 
                 # 3. モメンタム
-                sentiment_features['momentum_10'] = df['close'].pct_change(10)
-                sentiment_features['momentum_20'] = df['close'].pct_change(20)
-
-                # 4. RSI（過買い/過売り）
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                sentiment_features['rsi_14'] = 100 - (100 / (1 + rs))
+                features['momentum_10'] = close / _shift(close, 10) - 1
+                features['momentum_20'] = close / _shift(close, 20) - 1
+
+                # 4. RSI（過買い/過売り）- Wilder平滑化
+                if talib is not None:
+                    features['rsi_14'] = talib.RSI(close, timeperiod=14)
+                else:
+                    delta = close - prev_close
+                    gain = wilder_mean(np.clip(delta, 0, None), 14)
+                    loss = wilder_mean(np.clip(-delta, 0, None), 14)
+                    with np.errstate(divide='ignore'):
+                        features['rsi_14'] = 100 - (100 / (1 + gain / loss))
 
                 # 5. ボリューム変化率
-                sentiment_features['volume_change'] = df['volume'].pct_change()
-                sentiment_features['volume_ma_ratio'] = df['volume'] / df['volume'].rolling(20).mean()
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    features['volume_change'] = volume / _shift(volume, 1) - 1
+                    features['volume_ma_ratio'] = volume / pd.Series(volume).rolling(20).mean().to_numpy()
 
                 # 6. 価格位置（過去N日間の中での位置）
-                sentiment_features['price_position_20'] = (
-                    (df['close'] - df['low'].rolling(20).min()) /
-                    (df['high'].rolling(20).max() - df['low'].rolling(20).min())
-                )
+                low_min_20 = pd.Series(low).rolling(20).min().to_numpy()
+                high_max_20 = pd.Series(high).rolling(20).max().to_numpy()
+                features['price_position_20'] = (close - low_min_20) / (high_max_20 - low_min_20)
 
                 # 7. ギャップ分析
-                sentiment_features['gap'] = (df['open'] - df['close'].shift(1)) / df['close'].shift(1)
+                features['gap'] = (df['open'].to_numpy(dtype=np.float64) - prev_close) / prev_close
 
                 # 8. スプレッド異常（流動性低下の兆候）
                 if 'spread' in df.columns:
-                    sentiment_features['spread_ma_ratio'] = df['spread'] / df['spread'].rolling(20).mean()
+                    spread = df['spread'].to_numpy(dtype=np.float64)
+                    features['spread_ma_ratio'] = spread / pd.Series(spread).rolling(20).mean().to_numpy()
+
+                # 計算はfloat64、保存はfloat32
+                sentiment_features = pd.DataFrame(features, index=df.index).astype(np.float32)
 
                 # 保存
-                output_file = sentiment_dir / f"{instrument}_sentiment.csv"
-                sentiment_features.to_csv(output_file)
+                output_file = sentiment_dir / f"{instrument}_sentiment.parquet"
+                sentiment_features.to_parquet(output_file, **PARQUET_OPTIONS)
 
                 logger.info(f"    完了: {len(sentiment_features.columns)}指標")
 
@@ -358,51 +586,56 @@ class ComprehensiveDataCollector:
         ml_dir.mkdir(exist_ok=True)
 
         # 経済指標データ読み込み
-        econ_file = self.output_dir / "economic_indicators" / "all_indicators.csv"
+        econ_file = self.output_dir / "economic_indicators" / "all_indicators.parquet"
         econ_data = None
         if econ_file.exists():
-            econ_data = pd.read_csv(econ_file, index_col='date', parse_dates=True)
+            # 価格データ（OANDA, UTC）と同じタイムゾーンに揃える
+            econ_data = pd.read_parquet(econ_file).sort_index().tz_localize('UTC')
             logger.info(f"経済指標データ読み込み: {len(econ_data)}件")
 
         # 各通貨ペアごとに統合
         price_dir = self.output_dir / "price_data"
         sentiment_dir = self.output_dir / "sentiment"
 
-        for price_file in price_dir.glob("*.csv"):
+        for price_file in price_dir.glob("*_full_history.parquet"):
             instrument = price_file.stem.replace("_full_history", "")
             logger.info(f"\n{instrument} のML用データセット作成中...")
 
             try:
                 # 価格データ
-                price_df = pd.read_csv(price_file, index_col='time', parse_dates=True)
+                price_df = pd.read_parquet(price_file)
 
                 # センチメントデータ
-                sentiment_file = sentiment_dir / f"{instrument}_sentiment.csv"
+                sentiment_file = sentiment_dir / f"{instrument}_sentiment.parquet"
                 if sentiment_file.exists():
-                    sentiment_df = pd.read_csv(sentiment_file, index_col='time', parse_dates=True)
+                    sentiment_df = pd.read_parquet(sentiment_file)
                     price_df = price_df.join(sentiment_df, how='left')
 
                 # 経済指標データ（日次→時間足に拡張）
                 if econ_data is not None:
-                    # 日次データを時間足にリサンプル（前方補完）
-                    econ_hourly = econ_data.resample('H').ffill()
-                    price_df = price_df.join(econ_hourly, how='left')
-
-                # ターゲット変数作成
-                price_df['target_1h'] = price_df['close'].shift(-1) > price_df['close']  # 1時間後上昇
-                price_df['target_4h'] = price_df['close'].shift(-4) > price_df['close']  # 4時間後上昇
-                price_df['target_1d'] = price_df['close'].shift(-24) > price_df['close']  # 1日後上昇
-
-                price_df['return_1h'] = price_df['close'].pct_change(1).shift(-1)  # 1時間リターン
-                price_df['return_4h'] = price_df['close'].pct_change(4).shift(-4)  # 4時間リターン
-                price_df['return_1d'] = price_df['close'].pct_change(24).shift(-24)  # 1日リターン
+                    # 各時間足時点で直近の日次値の位置を二分探索で求めて結合
+                    # （merge_asof(direction='backward')と同じ結果、初日より前は欠損）
+                    price_df = price_df.sort_index()
+                    pos = econ_data.index.searchsorted(price_df.index, side='right') - 1
+                    econ_values = econ_data.to_numpy(dtype=np.float64)[np.clip(pos, 0, None)]
+                    econ_values[pos < 0] = np.nan
+                    aligned = pd.DataFrame(econ_values, index=price_df.index, columns=econ_data.columns, copy=False)
+                    price_df = pd.concat([price_df, aligned], axis=1, sort=False)
+
+                # ターゲット変数作成（N時間後の上昇フラグ・リターン）
+                close = price_df['close'].to_numpy(dtype=np.float64)
+                future_close = {label: _shift(close, -horizon) for label, horizon in TARGET_HORIZONS.items()}
+
+                targets = {f'target_{label}': future > close for label, future in future_close.items()}
+                targets.update({f'return_{label}': future / close - 1 for label, future in future_close.items()})
+                price_df = price_df.assign(**targets)
 
                 # 欠損値を含む行を削除（または補完）
                 price_df = price_df.ffill().bfill()
 
                 # 保存
-                output_file = ml_dir / f"{instrument}_ml_dataset.csv"
-                price_df.to_csv(output_file)
+                output_file = ml_dir / f"{instrument}_ml_dataset.parquet"
+                price_df.to_parquet(output_file, **PARQUET_OPTIONS)
 
                 logger.info(f"  保存: {output_file}")
                 logger.info(f"  サイズ: {price_df.shape}")
@@ -416,8 +649,13 @@ class ComprehensiveDataCollector:
 
     # ===== メイン実行 =====
 
-    def run(self, start_year: int = 2015, end_year: int = 2024):
-        """全データ収集を実行"""
+    def run(self, start_year: int = 2015, end_year: int = 2024, force_refresh: bool = False):
+        """
+        全データ収集を実行
+
+        Args:
+            force_refresh: Trueならキャッシュを無視してAPIから再取得
+        """
         logger.info("="*70)
         logger.info("包括的データ収集システム 開始")
         logger.info(f"期間: {start_year}年 ~ {end_year}年")
@@ -426,10 +664,10 @@ class ComprehensiveDataCollector:
         start_time = time.time()
 
         # 1. 価格データ収集
-        self.collect_full_price_history(start_year, end_year)
+        self.collect_full_price_history(start_year, end_year, force_refresh)
 
         # 2. 経済指標収集
-        self.collect_economic_indicators(f"{start_year}-01-01")
+        self.collect_economic_indicators(f"{start_year}-01-01", force_refresh)
 
         # 3. センチメントデータ生成
         self.collect_sentiment_data()
@@ -445,8 +683,7 @@ class ComprehensiveDataCollector:
             "execution_time_seconds": time.time() - start_time
         }
 
-        with open(self.output_dir / "metadata.json", 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        _dump_json(self.output_dir / "metadata.json", metadata)
 
         logger.info("\n" + "="*70)
         logger.info("全データ収集完了!")
@@ -10,16 +10,19 @@ sys.path.append(str(Path(__file__).parent.parent))
 import pandas as pd
 from datetime import datetime, timedelta
 from loguru import logger
-import time
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from src.api.oanda_client import OandaClient
+from src.tools import RateLimiter
 
 class Phase2DataCollector:
     """Phase 2用の大規模データ収集"""
 
     def __init__(self):
         self.client = OandaClient()
+        # 並列取得時も全スレッド合計でAPI制限内に収める
+        self._limiter = RateLimiter(0.2)
         self.output_dir = Path("data/phase2")
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -45,57 +48,69 @@ class Phase2DataCollector:
         price_dir = self.output_dir / "price_data"
         price_dir.mkdir(exist_ok=True)
 
-        for instrument in self.instruments:
-            logger.info(f"\n{instrument} のデータ収集中...")
+        # 通貨ペアごとに独立したリクエストなので並列取得
+        with ThreadPoolExecutor(max_workers=len(self.instruments)) as executor:
+            futures = [
+                executor.submit(self._collect_instrument, instrument, price_dir)
+                for instrument in self.instruments
+            ]
+            for future in as_completed(futures):
+                future.result()
 
-            try:
-                # 年ごとに分けて取得（API制限対策）
-                all_data = []
+        logger.info("\n価格データ収集完了!")
 
-                for year in range(self.start_year, self.end_year + 1):
-                    logger.info(f"  {year}年のデータ取得中...")
+    def _collect_instrument(self, instrument: str, price_dir: Path):
+        """1通貨ペア分の価格データを取得して保存"""
+        logger.info(f"\n{instrument} のデータ収集中...")
 
-                    # 1年 = 365日 * 24時間
-                    candles_per_year = 365 * 24
+        try:
+            # 年ごとに分けて取得（API制限対策）
+            all_data = []
 
-                    # 複数回に分けて取得
-                    chunks = (candles_per_year // 5000) + 1
+            for year in range(self.start_year, self.end_year + 1):
+                logger.info(f"  {instrument} {year}年のデータ取得中...")
 
-                    for chunk in range(chunks):
-                        count = min(5000, candles_per_year - chunk * 5000)
+                # 1年 = 365日 * 24時間
+                candles_per_year = 365 * 24
 
-                        if count <= 0:
-                            break
+                # 複数回に分けて取得
+                chunks = (candles_per_year // 5000) + 1
 
-                        data = self.client.get_historical_data(
-                            instrument=instrument,
-                            granularity="H1",
-                            count=count
-                        )
+                for chunk in range(chunks):
+                    count = min(5000, candles_per_year - chunk * 5000)
 
-                        if not data.empty:
-                            all_data.append(data)
-                            logger.info(f"    チャンク {chunk+1}/{chunks}: {len(data)}件")
+                    if count <= 0:
+                        break
 
-                        time.sleep(0.5)  # API制限
+                    self._limiter.wait()  # API制限
+                    data = self.client.get_historical_data(
+                        instrument=instrument,
+                        granularity="H1",
+                        count=count
+                    )
 
-                # 結合
-                if all_data:
-                    combined = pd.concat(all_data).drop_duplicates().sort_index()
+                    if not data.empty:
+                        all_data.append(data)
+                        logger.info(f"    {instrument} チャンク {chunk+1}/{chunks}: {len(data)}件")
 
-                    # 保存
-                    output_file = price_dir / f"{instrument}_{self.start_year}_{self.end_year}_H1.csv"
-                    combined.to_csv(output_file)
+            # 結合
+            if all_data:
+                combined = pd.concat(all_data)
+                # 重複はタイムスタンプで判定（値の比較・全体コピーを避ける）
+                combined = combined[~combined.index.duplicated(keep='first')]
+                if not combined.index.is_monotonic_increasing:
+                    combined = combined.sort_index()
 
-                    logger.info(f"{instrument} 完了: {len(combined)}件 -> {output_file}")
-                else:
-                    logger.warning(f"{instrument} データ取得失敗")
+                # 保存
+                output_file = price_dir / f"{instrument}_{self.start_year}_{self.end_year}_H1.parquet"
+                combined.to_parquet(output_file, engine='pyarrow', compression='zstd', index=True)
 
-            except Exception as e:
-                logger.error(f"{instrument} エラー: {e}")
-                continue
+                logger.info(f"{instrument} 完了: {len(combined)}件 -> {output_file}")
+            else:
+                logger.warning(f"{instrument} データ取得失敗")
 
-        logger.info("\n価格データ収集完了!")
+        except Exception as e:
+            logger.error(f"{instrument} エラー: {e}")
 
     def collect_economic_indicators(self):
         """経済指標データ収集（将来の拡張用）"""
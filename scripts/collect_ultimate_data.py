@@ -23,12 +23,122 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from loguru import logger
+import os
 import time
 import json
 import requests
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+from numpy.lib.stride_tricks import sliding_window_view
 warnings.filterwarnings('ignore')
 
+from src.tools import FileCache, cached_features, on_balance_volume, wilder_mean
+
+# 直近期間を含む履歴データのキャッシュ有効期限（秒）
+HISTORY_RECENT_TTL = 24 * 3600
+
+# ラグ・ローリング特徴量の生成に使う価格カラム
+LAG_INPUT_COLUMNS = ['close', 'high', 'low', 'volume']
+
+# Ultimate Datasetは列数が多いためParquet（列指向・zstd圧縮）で保存
+# （行グループ単位で読み込む期間を絞り込める）
+PARQUET_OPTIONS = {
+    'engine': 'pyarrow',
+    'compression': 'zstd',
+    'row_group_size': 50_000,
+}
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+
+def _rolling(series: pd.Series, window: int, func: str) -> pd.Series:
+    """
+    ローリング集計（mean/std/max/min）
+
+    bottleneckがあればpandasのウィンドウ処理を通さずCカーネルで計算する
+    （欠損を含むウィンドウはpandasと同じくNaN）
+    """
+    if bn is None or len(series) < window:
+        return getattr(series.rolling(window), func)()
+
+    values = series.to_numpy(dtype=np.float64)
+    if func == 'std':
+        result = bn.move_std(values, window=window, ddof=1)
+    else:
+        result = getattr(bn, f'move_{func}')(values, window=window)
+    return pd.Series(result, index=series.index)
+
+
+def _history_ttl(end: str) -> Optional[float]:
+    """終了日が1週間以上前の確定済み期間は無期限、それ以外は1日でキャッシュを更新"""
+    return None if datetime.strptime(end, "%Y-%m-%d") < datetime.now() - timedelta(days=7) else HISTORY_RECENT_TTL
+
+
+def _rolling_mad(values: np.ndarray, window: int) -> np.ndarray:
+    """ローリング平均絶対偏差（rolling.applyのPythonコールバックを使わずウィンドウをまとめて計算）"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window)
+        deviations = np.abs(windows - windows.mean(axis=1, keepdims=True))
+        result[window - 1:] = deviations.mean(axis=1)
+    return result
+
+
+def _download_history(symbols: list, start: str = "2015-01-01", end: str = "2024-12-31") -> tuple:
+    """
+    複数シンボルの日足をyfinanceの一括ダウンロード（内部でスレッド並列）で取得
+
+    Returns:
+        (全シンボル共通のカレンダー（取引日の和集合）,
+         {シンボル: そのシンボルの取引日のみのDataFrame（tz-naive）})
+    """
+    cache = FileCache("yfinance")
+    params = {'symbols': sorted(symbols), 'start': start, 'end': end}
+    data = cache.get_frame("yfinance/download", params, ttl=_history_ttl(end))
+
+    if data is None:
+        import yfinance as yf
+
+        # Ticker.history()と同じく配当・分割調整済み価格
+        data = yf.download(
+            symbols, start=start, end=end, group_by='ticker',
+            threads=True, auto_adjust=True, progress=False
+        )
+        if not data.empty:
+            cache.set_frame("yfinance/download", params, data)
+
+    # タイムゾーンは全シンボル共通のインデックスで一度だけ外す
+    if isinstance(data.index, pd.DatetimeIndex) and data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+
+    histories = {}
+    for symbol in symbols:
+        if symbol not in data.columns.get_level_values(0):
+            continue
+        # 全シンボルの取引日の和集合になっているので、そのシンボルの取引日に戻す
+        histories[symbol] = data[symbol].dropna(how='all')
+    return data.index, histories
+
+
+def _columns_to_frame(columns: dict, index: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    系列の辞書を共通カレンダー上のfloat32 DataFrameにまとめる
+
+    pd.DataFrame(dict)による系列ごとのインデックス和集合・再配置を行わず、
+    確保済みの行列に列単位で書き込む
+    """
+    matrix = np.empty((len(index), len(columns)), dtype=np.float32)
+    for i, series in enumerate(columns.values()):
+        matrix[:, i] = series.reindex(index).to_numpy(dtype=np.float32)
+    frame = pd.DataFrame(matrix, index=index, columns=list(columns), copy=False)
+    # 共通カレンダーには採用しなかったシンボルの取引日も含まれるため、値が一つもない日は除く
+    return frame.dropna(how='all')
+
+
 # ===== 1. COTレポート収集 =====
 def collect_cot_data(output_dir: Path):
     """CFTC COT (Commitment of Traders) レポート収集"""
@@ -61,8 +171,6 @@ def collect_cot_data(output_dir: Path):
         # 注: 実際のCFTCデータは週次で大きなファイル
 
         # 代替: yfinanceでCOT風のポジションデータを推定
-        import yfinance as yf
-
         cot_data = {}
 
         # 通貨先物ETFからポジション推定
@@ -74,31 +182,25 @@ def collect_cot_data(output_dir: Path):
             'FXC': 'CAD_position',  # カナダドルETF
         }
 
+        calendar, histories = _download_history(list(currency_etfs))
+
         for symbol, name in currency_etfs.items():
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(start="2015-01-01", end="2024-12-31")
-                if not hist.empty:
-                    # 出来高ベースのセンチメント推定
-                    hist['volume_ma'] = hist['Volume'].rolling(20).mean()
-                    hist['volume_ratio'] = hist['Volume'] / hist['volume_ma']
-                    hist['price_momentum'] = hist['Close'].pct_change(20)
-
-                    # ポジション推定（出来高×価格モメンタム）
-                    hist['estimated_position'] = hist['volume_ratio'] * np.sign(hist['price_momentum'])
-
-                    cot_data[name] = hist['estimated_position']
-                    cot_data[f'{name}_volume'] = hist['Volume']
-                    logger.info(f"  {name}: {len(hist)}件")
-            except Exception as e:
-                logger.warning(f"  {symbol}: エラー - {e}")
+            hist = histories.get(symbol)
+            if hist is None or hist.empty:
+                logger.warning(f"  {symbol}: データなし")
+                continue
 
-            time.sleep(1)
+            # 出来高ベースのセンチメント推定
+            volume_ratio = hist['Volume'] / hist['Volume'].rolling(20).mean()
+            price_momentum = hist['Close'].pct_change(20)
+
+            # ポジション推定（出来高×価格モメンタム）
+            cot_data[name] = volume_ratio * np.sign(price_momentum)
+            cot_data[f'{name}_volume'] = hist['Volume']
+            logger.info(f"  {name}: {len(hist)}件")
 
         if cot_data:
-            cot_df = pd.DataFrame(cot_data)
-            cot_df.index = cot_df.index.tz_localize(None)
-            cot_df = cot_df.sort_index()
+            cot_df = _columns_to_frame(cot_data, calendar)
             cot_df.to_csv(cot_dir / "cot_positions.csv")
             logger.info(f"\nCOTデータ保存: {len(cot_df)}件, {len(cot_df.columns)}列")
             return cot_df
@@ -123,6 +225,8 @@ def collect_google_trends(output_dir: Path):
         from pytrends.request import TrendReq
 
         pytrends = TrendReq(hl='en-US', tz=360)
+        cache = FileCache("google_trends")
+        start, end = '2015-01-01', '2024-12-31'
 
         # FX関連キーワード
         keywords_sets = [
@@ -137,8 +241,15 @@ def collect_google_trends(output_dir: Path):
         for keywords in keywords_sets:
             logger.info(f"  検索中: {keywords[:2]}...")
             try:
-                pytrends.build_payload(keywords, cat=0, timeframe='2015-01-01 2024-12-31', geo='', gprop='')
-                interest = pytrends.interest_over_time()
+                params = {'keywords': keywords, 'start': start, 'end': end}
+                interest = cache.get_frame("pytrends/interest_over_time", params, ttl=_history_ttl(end))
+
+                if interest is None:
+                    pytrends.build_payload(keywords, cat=0, timeframe=f'{start} {end}', geo='', gprop='')
+                    interest = pytrends.interest_over_time()
+                    if not interest.empty:
+                        cache.set_frame("pytrends/interest_over_time", params, interest)
+                    time.sleep(5)  # API制限（キャッシュ利用時は不要）
 
                 if not interest.empty:
                     interest = interest.drop(columns=['isPartial'], errors='ignore')
@@ -147,8 +258,6 @@ def collect_google_trends(output_dir: Path):
                         all_trends[clean_name] = interest[col]
                     logger.info(f"    取得: {len(interest)}件")
 
-                time.sleep(5)  # API制限
-
             except Exception as e:
                 logger.warning(f"    エラー: {e}")
                 continue
@@ -176,8 +285,6 @@ def collect_crypto_data(output_dir: Path):
     crypto_dir.mkdir(exist_ok=True)
 
     try:
-        import yfinance as yf
-
         cryptos = {
             'BTC-USD': 'bitcoin',
             'ETH-USD': 'ethereum',
@@ -186,27 +293,24 @@ def collect_crypto_data(output_dir: Path):
 
         crypto_data = {}
 
-        for symbol, name in cryptos.items():
-            logger.info(f"  {name} 取得中...")
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(start="2015-01-01", end="2024-12-31")
-
-                if not hist.empty:
-                    hist.index = hist.index.tz_localize(None)
-                    crypto_data[f'{name}_close'] = hist['Close']
-                    crypto_data[f'{name}_volume'] = hist['Volume']
-                    crypto_data[f'{name}_return'] = hist['Close'].pct_change()
-                    crypto_data[f'{name}_volatility'] = hist['Close'].pct_change().rolling(20).std()
-                    logger.info(f"    取得: {len(hist)}件")
+        logger.info(f"  {', '.join(cryptos.values())} 取得中...")
+        calendar, histories = _download_history(list(cryptos))
 
-            except Exception as e:
-                logger.warning(f"    エラー: {e}")
+        for symbol, name in cryptos.items():
+            hist = histories.get(symbol)
+            if hist is None or hist.empty:
+                logger.warning(f"    {name}: データなし")
+                continue
 
-            time.sleep(1)
+            returns = hist['Close'].pct_change()
+            crypto_data[f'{name}_close'] = hist['Close']
+            crypto_data[f'{name}_volume'] = hist['Volume']
+            crypto_data[f'{name}_return'] = returns
+            crypto_data[f'{name}_volatility'] = returns.rolling(20).std()
+            logger.info(f"    {name}: {len(hist)}件")
 
         if crypto_data:
-            crypto_df = pd.DataFrame(crypto_data)
+            crypto_df = _columns_to_frame(crypto_data, calendar)
             crypto_df.to_csv(crypto_dir / "crypto_data.csv")
             logger.info(f"\n暗号通貨データ保存: {len(crypto_df)}件")
             return crypto_df
@@ -228,8 +332,6 @@ def collect_additional_markets(output_dir: Path):
     markets_dir.mkdir(exist_ok=True)
 
     try:
-        import yfinance as yf
-
         # グローバル市場指数
         indices = {
             '^GSPC': 'sp500',
@@ -281,24 +383,17 @@ def collect_additional_markets(output_dir: Path):
         all_symbols = {**indices, **commodities, **bonds, **sectors}
         market_data = {}
 
-        for symbol, name in all_symbols.items():
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(start="2015-01-01", end="2024-12-31")
-
-                if not hist.empty and len(hist) > 100:
-                    hist.index = hist.index.tz_localize(None)
-                    market_data[f'{name}_close'] = hist['Close']
-                    market_data[f'{name}_return'] = hist['Close'].pct_change()
-                    logger.info(f"  {name}: {len(hist)}件")
+        calendar, histories = _download_history(list(all_symbols))
 
-            except Exception as e:
-                pass
-
-            time.sleep(0.5)
+        for symbol, name in all_symbols.items():
+            hist = histories.get(symbol)
+            if hist is not None and len(hist) > 100:
+                market_data[f'{name}_close'] = hist['Close']
+                market_data[f'{name}_return'] = hist['Close'].pct_change()
+                logger.info(f"  {name}: {len(hist)}件")
 
         if market_data:
-            market_df = pd.DataFrame(market_data)
+            market_df = _columns_to_frame(market_data, calendar)
             market_df.to_csv(markets_dir / "global_markets.csv")
             logger.info(f"\n市場データ保存: {len(market_df)}件, {len(market_df.columns)}列")
             return market_df
@@ -316,39 +411,53 @@ def generate_time_features(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("5. 季節性・時間特徴量生成")
     logger.info("="*70)
 
-    time_features = pd.DataFrame(index=df.index)
-
-    # 基本時間特徴量
-    time_features['hour'] = df.index.hour
-    time_features['day_of_week'] = df.index.dayofweek
-    time_features['day_of_month'] = df.index.day
-    time_features['month'] = df.index.month
-    time_features['quarter'] = df.index.quarter
-    time_features['year'] = df.index.year
-    time_features['week_of_year'] = df.index.isocalendar().week.values
-
-    # サイクル特徴量（sin/cos変換）
-    time_features['hour_sin'] = np.sin(2 * np.pi * df.index.hour / 24)
-    time_features['hour_cos'] = np.cos(2 * np.pi * df.index.hour / 24)
-    time_features['day_sin'] = np.sin(2 * np.pi * df.index.dayofweek / 7)
-    time_features['day_cos'] = np.cos(2 * np.pi * df.index.dayofweek / 7)
-    time_features['month_sin'] = np.sin(2 * np.pi * df.index.month / 12)
-    time_features['month_cos'] = np.cos(2 * np.pi * df.index.month / 12)
-
-    # セッション特徴量
-    time_features['is_tokyo_session'] = ((df.index.hour >= 0) & (df.index.hour < 9)).astype(int)
-    time_features['is_london_session'] = ((df.index.hour >= 8) & (df.index.hour < 17)).astype(int)
-    time_features['is_ny_session'] = ((df.index.hour >= 13) & (df.index.hour < 22)).astype(int)
-    time_features['is_overlap_london_ny'] = ((df.index.hour >= 13) & (df.index.hour < 17)).astype(int)
-
-    # 特別な日
-    time_features['is_month_start'] = (df.index.day <= 3).astype(int)
-    time_features['is_month_end'] = (df.index.day >= 28).astype(int)
-    time_features['is_quarter_end'] = ((df.index.month % 3 == 0) & (df.index.day >= 28)).astype(int)
-    time_features['is_year_end'] = ((df.index.month == 12) & (df.index.day >= 28)).astype(int)
-    time_features['is_monday'] = (df.index.dayofweek == 0).astype(int)
-    time_features['is_friday'] = (df.index.dayofweek == 4).astype(int)
-    time_features['is_weekend_adjacent'] = ((df.index.dayofweek == 0) | (df.index.dayofweek == 4)).astype(int)
+    # カレンダー項目はインデックスから一度だけ取り出し、以降はNumPy配列で計算
+    # （整数項目はint8/int16、周期特徴量はfloat32で保持）
+    hour = df.index.hour.to_numpy().astype(np.int8)
+    day_of_week = df.index.dayofweek.to_numpy().astype(np.int8)
+    day = df.index.day.to_numpy().astype(np.int8)
+    month = df.index.month.to_numpy().astype(np.int8)
+
+    # 周期の角度は整数配列を先にfloat32へ変換してから計算する
+    # （NumPy 1.xではint8配列×floatスカラーがfloat16になるため）
+    hour_angle = hour.astype(np.float32) * np.float32(2 * np.pi / 24)
+    day_angle = day_of_week.astype(np.float32) * np.float32(2 * np.pi / 7)
+    month_angle = month.astype(np.float32) * np.float32(2 * np.pi / 12)
+
+    features = {
+        # 基本時間特徴量
+        'hour': hour,
+        'day_of_week': day_of_week,
+        'day_of_month': day,
+        'month': month,
+        'quarter': df.index.quarter.to_numpy().astype(np.int8),
+        'year': df.index.year.to_numpy().astype(np.int16),
+        'week_of_year': df.index.isocalendar().week.to_numpy(dtype=np.int8),
+
+        # サイクル特徴量（sin/cos変換）
+        'hour_sin': np.sin(hour_angle),
+        'hour_cos': np.cos(hour_angle),
+        'day_sin': np.sin(day_angle),
+        'day_cos': np.cos(day_angle),
+        'month_sin': np.sin(month_angle),
+        'month_cos': np.cos(month_angle),
+
+        # セッション特徴量
+        'is_tokyo_session': (hour < 9).astype(np.int8),
+        'is_london_session': ((hour >= 8) & (hour < 17)).astype(np.int8),
+        'is_ny_session': ((hour >= 13) & (hour < 22)).astype(np.int8),
+        'is_overlap_london_ny': ((hour >= 13) & (hour < 17)).astype(np.int8),
+
+        # 特別な日
+        'is_month_start': (day <= 3).astype(np.int8),
+        'is_month_end': (day >= 28).astype(np.int8),
+        'is_quarter_end': ((month % 3 == 0) & (day >= 28)).astype(np.int8),
+        'is_year_end': ((month == 12) & (day >= 28)).astype(np.int8),
+        'is_monday': (day_of_week == 0).astype(np.int8),
+        'is_friday': (day_of_week == 4).astype(np.int8),
+        'is_weekend_adjacent': ((day_of_week == 0) | (day_of_week == 4)).astype(np.int8),
+    }
+    time_features = pd.DataFrame(features, index=df.index, copy=False)
 
     logger.info(f"時間特徴量生成: {len(time_features.columns)}個")
 
@@ -362,14 +471,28 @@ def generate_lag_features(df: pd.DataFrame, price_col: str = 'close') -> pd.Data
     logger.info("6. ラグ・ローリング特徴量生成")
     logger.info("="*70)
 
-    lag_features = pd.DataFrame(index=df.index)
+    # 列ごとにDataFrameへ代入せず、辞書に集めて最後に一度だけ構築する
+    features = {}
+
+    # 各指標で共通の中間結果は一度だけ計算して使い回す
+    price = df[price_col]
+    high = df['high'] if 'high' in df.columns else price
+    low = df['low'] if 'low' in df.columns else price
+    returns = price.pct_change()
+    prev_close = price.shift(1)
+    delta = price.diff()
+
+    rolling_high = {}
+    rolling_low = {}
+    sma = {}
+    std = {}
 
     # ラグ特徴量（1h〜168h = 1週間）
     lag_periods = [1, 2, 3, 4, 6, 8, 12, 24, 48, 72, 96, 120, 168]
 
     for lag in lag_periods:
-        lag_features[f'close_lag_{lag}h'] = df[price_col].shift(lag)
-        lag_features[f'return_lag_{lag}h'] = df[price_col].pct_change(lag)
+        features[f'close_lag_{lag}h'] = price.shift(lag)
+        features[f'return_lag_{lag}h'] = price.pct_change(lag)
 
     logger.info(f"  ラグ特徴量: {len(lag_periods) * 2}個")
 
@@ -377,121 +500,130 @@ def generate_lag_features(df: pd.DataFrame, price_col: str = 'close') -> pd.Data
     windows = [5, 10, 20, 50, 100, 200]
 
     for w in windows:
+        returns_roll = returns.rolling(w)
+        sma[w] = _rolling(price, w, 'mean')
+        std[w] = _rolling(price, w, 'std')
+        rolling_high[w] = _rolling(high, w, 'max')
+        rolling_low[w] = _rolling(low, w, 'min')
+
         # 移動平均
-        lag_features[f'sma_{w}'] = df[price_col].rolling(w).mean()
-        lag_features[f'ema_{w}'] = df[price_col].ewm(span=w).mean()
+        features[f'sma_{w}'] = sma[w]
+        features[f'ema_{w}'] = price.ewm(span=w).mean()
 
         # 標準偏差・ボラティリティ
-        lag_features[f'std_{w}'] = df[price_col].rolling(w).std()
-        lag_features[f'volatility_{w}'] = df[price_col].pct_change().rolling(w).std() * np.sqrt(252 * 24)
+        features[f'std_{w}'] = std[w]
+        features[f'volatility_{w}'] = _rolling(returns, w, 'std') * np.sqrt(252 * 24)
 
         # 最高・最低
-        lag_features[f'high_{w}'] = df['high'].rolling(w).max() if 'high' in df.columns else df[price_col].rolling(w).max()
-        lag_features[f'low_{w}'] = df['low'].rolling(w).min() if 'low' in df.columns else df[price_col].rolling(w).min()
+        features[f'high_{w}'] = rolling_high[w]
+        features[f'low_{w}'] = rolling_low[w]
 
         # レンジ
-        lag_features[f'range_{w}'] = lag_features[f'high_{w}'] - lag_features[f'low_{w}']
+        features[f'range_{w}'] = features[f'high_{w}'] - features[f'low_{w}']
 
         # 価格位置
-        lag_features[f'price_position_{w}'] = (df[price_col] - lag_features[f'low_{w}']) / (lag_features[f'range_{w}'] + 1e-10)
+        features[f'price_position_{w}'] = (price - features[f'low_{w}']) / (features[f'range_{w}'] + 1e-10)
 
         # モメンタム
-        lag_features[f'momentum_{w}'] = df[price_col] - df[price_col].shift(w)
-        lag_features[f'momentum_pct_{w}'] = df[price_col].pct_change(w)
+        past_price = price.shift(w)
+        momentum = price - past_price
+        features[f'momentum_{w}'] = momentum
+        features[f'momentum_pct_{w}'] = price.pct_change(w)
 
         # ROC (Rate of Change)
-        lag_features[f'roc_{w}'] = (df[price_col] - df[price_col].shift(w)) / df[price_col].shift(w)
+        features[f'roc_{w}'] = momentum / past_price
 
         # 歪度・尖度
-        lag_features[f'skew_{w}'] = df[price_col].pct_change().rolling(w).skew()
-        lag_features[f'kurtosis_{w}'] = df[price_col].pct_change().rolling(w).kurt()
+        features[f'skew_{w}'] = returns_roll.skew()
+        features[f'kurtosis_{w}'] = returns_roll.kurt()
 
     logger.info(f"  ローリング特徴量: {len(windows) * 14}個")
 
     # ボリンジャーバンド
     for w in [20, 50]:
-        sma = df[price_col].rolling(w).mean()
-        std = df[price_col].rolling(w).std()
-        lag_features[f'bb_upper_{w}'] = sma + 2 * std
-        lag_features[f'bb_lower_{w}'] = sma - 2 * std
-        lag_features[f'bb_width_{w}'] = (lag_features[f'bb_upper_{w}'] - lag_features[f'bb_lower_{w}']) / sma
-        lag_features[f'bb_position_{w}'] = (df[price_col] - lag_features[f'bb_lower_{w}']) / (lag_features[f'bb_upper_{w}'] - lag_features[f'bb_lower_{w}'] + 1e-10)
+        features[f'bb_upper_{w}'] = sma[w] + 2 * std[w]
+        features[f'bb_lower_{w}'] = sma[w] - 2 * std[w]
+        features[f'bb_width_{w}'] = (features[f'bb_upper_{w}'] - features[f'bb_lower_{w}']) / sma[w]
+        features[f'bb_position_{w}'] = (price - features[f'bb_lower_{w}']) / (features[f'bb_upper_{w}'] - features[f'bb_lower_{w}'] + 1e-10)
 
     # MACD
-    ema12 = df[price_col].ewm(span=12).mean()
-    ema26 = df[price_col].ewm(span=26).mean()
-    lag_features['macd'] = ema12 - ema26
-    lag_features['macd_signal'] = lag_features['macd'].ewm(span=9).mean()
-    lag_features['macd_hist'] = lag_features['macd'] - lag_features['macd_signal']
-
-    # RSI（複数期間）
+    ema12 = price.ewm(span=12).mean()
+    ema26 = price.ewm(span=26).mean()
+    features['macd'] = ema12 - ema26
+    features['macd_signal'] = features['macd'].ewm(span=9).mean()
+    features['macd_hist'] = features['macd'] - features['macd_signal']
+
+    # RSI（複数期間、Wilder平滑化）
+    delta_values = delta.to_numpy(dtype=np.float64)
+    gains = np.clip(delta_values, 0, None)
+    losses = np.clip(-delta_values, 0, None)
     for period in [7, 14, 21]:
-        delta = df[price_col].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
-        rs = gain / (loss + 1e-10)
-        lag_features[f'rsi_{period}'] = 100 - (100 / (1 + rs))
+        rs = wilder_mean(gains, period) / (wilder_mean(losses, period) + 1e-10)
+        features[f'rsi_{period}'] = 100 - (100 / (1 + rs))
 
-    # ストキャスティクス
+    # ストキャスティクス（Williams %Rと同じ期間の最高・最低値を共有）
     for period in [14, 21]:
-        low_min = df['low'].rolling(period).min() if 'low' in df.columns else df[price_col].rolling(period).min()
-        high_max = df['high'].rolling(period).max() if 'high' in df.columns else df[price_col].rolling(period).max()
-        lag_features[f'stoch_k_{period}'] = 100 * (df[price_col] - low_min) / (high_max - low_min + 1e-10)
-        lag_features[f'stoch_d_{period}'] = lag_features[f'stoch_k_{period}'].rolling(3).mean()
-
-    # ATR
-    if 'high' in df.columns and 'low' in df.columns:
+        rolling_low[period] = low_min = _rolling(low, period, 'min')
+        rolling_high[period] = high_max = _rolling(high, period, 'max')
+        features[f'stoch_k_{period}'] = 100 * (price - low_min) / (high_max - low_min + 1e-10)
+        features[f'stoch_d_{period}'] = _rolling(features[f'stoch_k_{period}'], 3, 'mean')
+
+    # ATR（True RangeはADXでも使用）
+    has_range = 'high' in df.columns and 'low' in df.columns
+    if has_range:
+        high_values = df['high'].to_numpy(dtype=np.float64)
+        low_values = df['low'].to_numpy(dtype=np.float64)
+        prev_close_values = prev_close.to_numpy(dtype=np.float64)
+        # fmaxで欠損（先頭行の前日終値等）を無視（pandasのmax(axis=1)と同じ）
+        true_range = np.fmax(
+            np.fmax(high_values - low_values, np.abs(high_values - prev_close_values)),
+            np.abs(low_values - prev_close_values)
+        )
+        true_range = pd.Series(true_range, index=df.index)
         for period in [14, 21]:
-            high_low = df['high'] - df['low']
-            high_close = abs(df['high'] - df[price_col].shift(1))
-            low_close = abs(df['low'] - df[price_col].shift(1))
-            true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-            lag_features[f'atr_{period}'] = true_range.rolling(period).mean()
-            lag_features[f'atr_pct_{period}'] = lag_features[f'atr_{period}'] / df[price_col]
+            features[f'atr_{period}'] = _rolling(true_range, period, 'mean')
+            features[f'atr_pct_{period}'] = features[f'atr_{period}'] / price
 
     # CCI (Commodity Channel Index)
+    tp = (df['high'] + df['low'] + price) / 3 if has_range else price
     for period in [14, 20]:
-        if 'high' in df.columns and 'low' in df.columns:
-            tp = (df['high'] + df['low'] + df[price_col]) / 3
-        else:
-            tp = df[price_col]
-        sma_tp = tp.rolling(period).mean()
-        mad = tp.rolling(period).apply(lambda x: np.abs(x - x.mean()).mean())
-        lag_features[f'cci_{period}'] = (tp - sma_tp) / (0.015 * mad + 1e-10)
+        sma_tp = _rolling(tp, period, 'mean')
+        mad = pd.Series(_rolling_mad(tp.to_numpy(dtype=np.float64), period), index=tp.index)
+        features[f'cci_{period}'] = (tp - sma_tp) / (0.015 * mad + 1e-10)
 
     # ADX (Average Directional Index)
-    if 'high' in df.columns and 'low' in df.columns:
+    if has_range:
         plus_dm = df['high'].diff()
         minus_dm = df['low'].diff()
         plus_dm[plus_dm < 0] = 0
         minus_dm[minus_dm > 0] = 0
 
-        tr = pd.concat([
-            df['high'] - df['low'],
-            abs(df['high'] - df[price_col].shift(1)),
-            abs(df['low'] - df[price_col].shift(1))
-        ], axis=1).max(axis=1)
-
-        atr = tr.rolling(14).mean()
-        plus_di = 100 * (plus_dm.rolling(14).mean() / atr)
-        minus_di = 100 * (abs(minus_dm).rolling(14).mean() / atr)
+        atr = features['atr_14']
+        plus_di = 100 * (_rolling(plus_dm, 14, 'mean') / atr)
+        minus_di = 100 * (_rolling(abs(minus_dm), 14, 'mean') / atr)
         dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)
-        lag_features['adx'] = dx.rolling(14).mean()
-        lag_features['plus_di'] = plus_di
-        lag_features['minus_di'] = minus_di
+        features['adx'] = _rolling(dx, 14, 'mean')
+        features['plus_di'] = plus_di
+        features['minus_di'] = minus_di
 
     # Williams %R
     for period in [14, 21]:
-        high_max = df['high'].rolling(period).max() if 'high' in df.columns else df[price_col].rolling(period).max()
-        low_min = df['low'].rolling(period).min() if 'low' in df.columns else df[price_col].rolling(period).min()
-        lag_features[f'williams_r_{period}'] = -100 * (high_max - df[price_col]) / (high_max - low_min + 1e-10)
+        high_max = rolling_high[period]
+        low_min = rolling_low[period]
+        features[f'williams_r_{period}'] = -100 * (high_max - price) / (high_max - low_min + 1e-10)
 
     # OBV (On Balance Volume) - if volume available
     if 'volume' in df.columns:
-        obv = (np.sign(df[price_col].diff()) * df['volume']).fillna(0).cumsum()
-        lag_features['obv'] = obv
-        lag_features['obv_sma_20'] = obv.rolling(20).mean()
-        lag_features['obv_momentum'] = obv - obv.shift(20)
+        obv = pd.Series(
+            on_balance_volume(price.to_numpy(dtype=np.float64), df['volume'].to_numpy(dtype=np.float64)),
+            index=df.index
+        )
+        features['obv'] = obv
+        features['obv_sma_20'] = _rolling(obv, 20, 'mean')
+        features['obv_momentum'] = obv - obv.shift(20)
+
+    # 計算はfloat64で行い、保持・結合はfloat32（メモリ・帯域を半減）
+    lag_features = pd.DataFrame(features, index=df.index).astype(np.float32)
 
     logger.info(f"  テクニカル指標: ~50個")
     logger.info(f"  合計ラグ特徴量: {len(lag_features.columns)}個")
@@ -510,9 +642,9 @@ def generate_cross_currency_features(output_dir: Path) -> pd.DataFrame:
 
     # 全通貨ペアの終値を読み込み
     all_prices = {}
-    for price_file in price_dir.glob("*_full_history.csv"):
+    for price_file in price_dir.glob("*_full_history.parquet"):
         instrument = price_file.stem.replace("_full_history", "")
-        df = pd.read_csv(price_file, index_col='time', parse_dates=True)
+        df = pd.read_parquet(price_file, columns=['close'])
         df.index = df.index.tz_localize(None)
         all_prices[instrument] = df['close']
 
@@ -520,56 +652,97 @@ def generate_cross_currency_features(output_dir: Path) -> pd.DataFrame:
         return pd.DataFrame()
 
     prices_df = pd.DataFrame(all_prices)
-    cross_features = pd.DataFrame(index=prices_df.index)
+    cross_features = cached_features(_cross_currency_features, prices_df)
+
+    logger.info(f"クロス通貨特徴量: {len(cross_features.columns)}個")
+
+    return cross_features
+
+
+def _cross_currency_features(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """全通貨ペアの終値からクロス通貨特徴量を計算"""
+    features = {}
 
     # リターン計算
     returns = prices_df.pct_change()
 
-    # ローリング相関
+    # ローリング相関（主要ペア間のみ計算。全ペアの相関行列は作らない）
+    pairs = [
+        ('USD_JPY', 'EUR_USD'),
+        ('USD_JPY', 'GBP_USD'),
+        ('EUR_USD', 'GBP_USD'),
+        ('USD_JPY', 'AUD_USD'),
+    ]
     for window in [24, 72, 168]:  # 1日、3日、1週間
-        corr_matrix = returns.rolling(window).corr()
-
-        # 主要ペア間の相関
-        pairs = [
-            ('USD_JPY', 'EUR_USD'),
-            ('USD_JPY', 'GBP_USD'),
-            ('EUR_USD', 'GBP_USD'),
-            ('USD_JPY', 'AUD_USD'),
-        ]
-
         for pair1, pair2 in pairs:
             if pair1 in returns.columns and pair2 in returns.columns:
-                corr = returns[pair1].rolling(window).corr(returns[pair2])
-                cross_features[f'corr_{pair1}_{pair2}_{window}h'] = corr
+                features[f'corr_{pair1}_{pair2}_{window}h'] = returns[pair1].rolling(window).corr(returns[pair2])
 
     # 通貨強弱インデックス
-    usd_pairs = ['USD_JPY', 'USD_CHF', 'USD_CAD']
-    usd_returns = []
-    for pair in usd_pairs:
-        if pair in returns.columns:
-            usd_returns.append(returns[pair])
-
-    if usd_returns:
-        cross_features['usd_strength'] = pd.concat(usd_returns, axis=1).mean(axis=1).rolling(24).mean()
-
-    jpy_pairs = ['USD_JPY', 'EUR_JPY', 'GBP_JPY', 'AUD_JPY']
-    jpy_returns = []
-    for pair in jpy_pairs:
-        if pair in returns.columns:
-            jpy_returns.append(-returns[pair])  # JPYが分母なので反転
+    usd_pairs = [pair for pair in ['USD_JPY', 'USD_CHF', 'USD_CAD'] if pair in returns.columns]
+    if usd_pairs:
+        features['usd_strength'] = returns[usd_pairs].mean(axis=1).rolling(24).mean()
 
-    if jpy_returns:
-        cross_features['jpy_strength'] = pd.concat(jpy_returns, axis=1).mean(axis=1).rolling(24).mean()
+    jpy_pairs = [pair for pair in ['USD_JPY', 'EUR_JPY', 'GBP_JPY', 'AUD_JPY'] if pair in returns.columns]
+    if jpy_pairs:
+        features['jpy_strength'] = (-returns[jpy_pairs]).mean(axis=1).rolling(24).mean()  # JPYが分母なので反転
 
     # スプレッド特徴量
     if 'EUR_USD' in prices_df.columns and 'GBP_USD' in prices_df.columns:
-        cross_features['eur_gbp_spread'] = prices_df['EUR_USD'] / prices_df['GBP_USD']
-        cross_features['eur_gbp_spread_ma'] = cross_features['eur_gbp_spread'].rolling(24).mean()
-        cross_features['eur_gbp_spread_std'] = cross_features['eur_gbp_spread'].rolling(24).std()
+        eur_gbp_spread = prices_df['EUR_USD'] / prices_df['GBP_USD']
+        features['eur_gbp_spread'] = eur_gbp_spread
+        features['eur_gbp_spread_ma'] = eur_gbp_spread.rolling(24).mean()
+        features['eur_gbp_spread_std'] = eur_gbp_spread.rolling(24).std()
 
-    logger.info(f"クロス通貨特徴量: {len(cross_features.columns)}個")
+    return pd.DataFrame(features, index=prices_df.index)
 
-    return cross_features
+
+# ===== 通貨ペアごとのUltimate Dataset生成（並列ワーカー） =====
+# 全通貨ペア共通の特徴量（ワーカープロセスごとにinitializerで設定）
+_shared_features = []
+
+
+def _init_worker(shared_features: list):
+    global _shared_features
+    _shared_features = shared_features
+
+
+def _build_ultimate_dataset(ml_file: Path, ultimate_ml_dir: Path):
+    """1通貨ペア分のUltimate Datasetを生成して保存"""
+    instrument = ml_file.stem.replace("_ml_dataset", "")
+    logger.info(f"\n{instrument} の Ultimate Dataset 生成中...")
+
+    # 既存データ読み込み
+    df = pd.read_parquet(ml_file)
+    df.index = df.index.tz_localize(None)
+
+    # ラグ特徴量は価格カラムのみから決まるので、その内容をキーにキャッシュ
+    lag_inputs = df[[col for col in LAG_INPUT_COLUMNS if col in df.columns]]
+    lag_features = cached_features(
+        generate_lag_features, lag_inputs, depends_on=(_rolling, _rolling_mad, wilder_mean, on_balance_volume)
+    )
+
+    # 通貨ペア固有の時間特徴量・ラグ特徴量 + 共通特徴量
+    pieces = [generate_time_features(df), lag_features] + _shared_features
+
+    # joinを繰り返さず、各特徴量を時間足インデックスに揃えて一度に結合
+    df = pd.concat([df] + [piece.reindex(df.index) for piece in pieces], axis=1, sort=False)
+
+    # 同名の列（センチメント特徴量のrsi_14等）は既存の列を優先
+    duplicated = df.columns.duplicated()
+    if duplicated.any():
+        logger.warning(f"  {instrument} 重複列を除外: {list(df.columns[duplicated])}")
+        df = df.loc[:, ~duplicated]
+
+    # 無限値を欠損扱いにしてから欠損値を補完（補完は一度で済む）
+    df = df.replace([np.inf, -np.inf], np.nan).ffill().bfill()
+
+    # 保存
+    output_file = ultimate_ml_dir / f"{instrument}_ultimate.parquet"
+    df.to_parquet(output_file, **PARQUET_OPTIONS)
+
+    logger.info(f"  保存: {output_file}")
+    logger.info(f"  サイズ: {df.shape}")
 
 
 # ===== メイン実行 =====
@@ -609,57 +782,26 @@ def main():
     # クロス通貨特徴量
     cross_features = generate_cross_currency_features(output_dir)
 
-    for ml_file in ml_dir.glob("*_ml_dataset.csv"):
-        instrument = ml_file.stem.replace("_ml_dataset", "")
-        logger.info(f"\n{instrument} の Ultimate Dataset 生成中...")
-
-        # 既存データ読み込み
-        df = pd.read_csv(ml_file, index_col='time', parse_dates=True)
-        df.index = df.index.tz_localize(None)
-
-        # 時間特徴量追加
-        time_features = generate_time_features(df)
-        df = df.join(time_features, how='left')
-
-        # ラグ特徴量追加
-        lag_features = generate_lag_features(df)
-        df = df.join(lag_features, how='left')
-
-        # クロス通貨特徴量追加
-        df = df.join(cross_features, how='left')
-
-        # 追加市場データ結合（日次→時間足）
-        if not market_data.empty:
-            market_hourly = market_data.resample('h').ffill()
-            df = df.join(market_hourly, how='left')
-
-        # 暗号通貨データ結合
-        if not crypto_data.empty:
-            crypto_hourly = crypto_data.resample('h').ffill()
-            df = df.join(crypto_hourly, how='left')
-
-        # COTデータ結合
-        if not cot_data.empty:
-            cot_hourly = cot_data.resample('h').ffill()
-            df = df.join(cot_hourly, how='left')
-
-        # Google Trends結合（週次→時間足）
-        if not trends_data.empty:
-            trends_hourly = trends_data.resample('h').ffill()
-            df = df.join(trends_hourly, how='left')
-
-        # 欠損値処理
-        df = df.ffill().bfill()
-
-        # 無限値処理
-        df = df.replace([np.inf, -np.inf], np.nan).ffill().bfill()
-
-        # 保存
-        output_file = ultimate_ml_dir / f"{instrument}_ultimate.csv"
-        df.to_csv(output_file)
-
-        logger.info(f"  保存: {output_file}")
-        logger.info(f"  サイズ: {df.shape}")
+    # 全通貨ペア共通の特徴量は時間足への拡張・型変換をループの外で一度だけ行う
+    # （追加市場データ・暗号通貨・COTは日次、Google Trendsは週次）
+    shared_features = [cross_features.astype(np.float32)] + [
+        extra_data.resample('h').ffill().astype(np.float32)
+        for extra_data in (market_data, crypto_data, cot_data, trends_data)
+        if not extra_data.empty
+    ]
+
+    # 通貨ペアごとの特徴量生成は互いに独立したCPU処理なのでプロセス並列で実行
+    # （共通特徴量はinitializerで各ワーカーに一度だけ渡す）
+    ml_files = sorted(ml_dir.glob("*_ml_dataset.parquet"))
+    if ml_files:
+        with ProcessPoolExecutor(
+            max_workers=min(len(ml_files), os.cpu_count() or 1),
+            initializer=_init_worker,
+            initargs=(shared_features,)
+        ) as executor:
+            futures = [executor.submit(_build_ultimate_dataset, ml_file, ultimate_ml_dir) for ml_file in ml_files]
+            for future in as_completed(futures):
+                future.result()
 
     # メタデータ保存
     elapsed = time.time() - start_time
@@ -2,17 +2,343 @@
 Ultimate ML Dataset Generator
 最強のML学習用データセット生成
 """
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
 from dotenv import load_dotenv
 load_dotenv()
 
 import pandas as pd
 import numpy as np
-from pathlib import Path
 from loguru import logger
 import time
 import json
 from datetime import datetime
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from numpy.lib.stride_tricks import sliding_window_view
+import pyarrow.parquet as pq
+
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+from src.tools import (
+    FileCache, cached_features, ewm_mean, on_balance_volume,
+    rolling_mad, rolling_mean_std, rolling_skew_kurt, wilder_mean,
+)
+
+# Ultimate Datasetは列数が多いためParquet（列指向・zstd圧縮）で保存
+# （行グループ単位で読み込む期間を絞り込める）
+PARQUET_OPTIONS = {
+    'engine': 'pyarrow',
+    'compression': 'zstd',
+    'row_group_size': 50_000,
+}
+
+
+def _evaluate(expression: str, **operands) -> np.ndarray:
+    """
+    配列の複合演算式を評価
+
+    numexprがあれば中間配列を作らず1回のループで計算し、なければpandas.eval（NumPy）で同じ式を評価する
+    """
+    if ne is not None:
+        return ne.evaluate(expression, local_dict=operands)
+    return pd.eval(expression, local_dict=operands, engine="python")
+
+
+def _read_csv_cached(path: Path) -> pd.DataFrame:
+    """
+    収集済みCSVを読み込む（存在しなければ空のDataFrame）
+
+    (パス, 更新時刻, サイズ) をキーにParquetでキャッシュし、CSVが更新されない限り再パースしない
+    """
+    if not path.exists():
+        return pd.DataFrame()
+
+    stat = path.stat()
+    cache = FileCache("csv")
+    params = {'path': str(path.resolve()), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    df = cache.get_frame("read_csv", params)
+
+    if df is None:
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        cache.set_frame("read_csv", params, df)
+
+    return df
+
+
+def _rolling_corr(x: np.ndarray, y: np.ndarray, window: int) -> np.ndarray:
+    """
+    ローリング相関係数（Series.rolling().corr()と同じ値）
+
+    ウィンドウをコピーせずストライドビューで並べ、各和をまとめて計算する
+    （ウィンドウ内に欠損を含む位置はNaN）
+    """
+    result = np.full(len(x), np.nan)
+    if len(x) < window:
+        return result
+
+    xw = sliding_window_view(x, window)
+    yw = sliding_window_view(y, window)
+    sx = xw.sum(axis=1)
+    sy = yw.sum(axis=1)
+    sxx = np.einsum('ij,ij->i', xw, xw)
+    syy = np.einsum('ij,ij->i', yw, yw)
+    sxy = np.einsum('ij,ij->i', xw, yw)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[window - 1:] = (sxy - sx * sy / window) / np.sqrt((sxx - sx * sx / window) * (syy - sy * sy / window))
+    return result
+
+
+def _cross_currency_features(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """全通貨ペアの終値からクロス通貨特徴量を計算"""
+    returns = prices_df.pct_change()
+
+    cross = {}
+    for window in [24, 72, 168]:
+        pairs = [("USD_JPY", "EUR_USD"), ("USD_JPY", "GBP_USD"), ("EUR_USD", "GBP_USD")]
+        for p1, p2 in pairs:
+            if p1 in returns.columns and p2 in returns.columns:
+                cross[f"corr_{p1}_{p2}_{window}h"] = _rolling_corr(
+                    returns[p1].to_numpy(dtype=np.float64), returns[p2].to_numpy(dtype=np.float64), window
+                )
+
+    # USD/JPY 強度
+    usd_rets = [returns[p] for p in ["USD_JPY", "USD_CHF", "USD_CAD"] if p in returns.columns]
+    if usd_rets:
+        cross["usd_strength"] = pd.concat(usd_rets, axis=1).mean(axis=1).rolling(24).mean()
+
+    jpy_rets = [-returns[p] for p in ["USD_JPY", "EUR_JPY", "GBP_JPY"] if p in returns.columns]
+    if jpy_rets:
+        cross["jpy_strength"] = pd.concat(jpy_rets, axis=1).mean(axis=1).rolling(24).mean()
+
+    # 列ごとに代入せず最後に一度だけ構築
+    return pd.DataFrame(cross, index=prices_df.index)
+
+
+def _missing_periods(existing: set, periods: list, *names: str) -> list:
+    """
+    出力列のいずれかが既存列にない期間だけを返す
+
+    names は期間で埋める列名の書式（例: "rsi_{}_ext"、期間がタプルなら "macd_{}_{}"）
+    """
+    return [
+        period for period in periods
+        if any(name.format(*(period if isinstance(period, tuple) else (period,))) not in existing for name in names)
+    ]
+
+
+# ===== 通貨ペアごとのUltimate Dataset生成（並列ワーカー） =====
+# 全通貨ペア共通の特徴量（ワーカープロセスごとにinitializerで設定）
+_shared_features = {}
+
+
+def _init_worker(shared_features: dict):
+    global _shared_features
+    _shared_features = shared_features
+
+
+def _build_ultimate_dataset(ml_file: Path, ultimate_ml_dir: Path):
+    """1通貨ペア分のUltimate Datasetを生成して保存"""
+    instrument = ml_file.stem.replace("_ml_dataset", "")
+    logger.info(f"\n{instrument} の Ultimate Dataset 生成中...")
+
+    df = pd.read_parquet(ml_file)
+    df.index = df.index.tz_localize(None)
+
+    # 元データに既にある指標は再計算しない（再実行時は新しく追加した特徴量だけを計算）
+    existing = set(df.columns)
+
+    # 列ごとにDataFrameへ代入せず、辞書に集めて最後に一度だけ結合する
+    features = {}
+
+    # 時間特徴量（日時フィールドはインデックスから一度だけ取り出して使い回す、整数項目はint8で保持）
+    hour = df.index.hour.to_numpy().astype(np.int8)
+    day_of_week = df.index.dayofweek.to_numpy().astype(np.int8)
+    month = df.index.month.to_numpy().astype(np.int8)
+    features["hour"] = hour
+    features["day_of_week"] = day_of_week
+    features["month"] = month
+    features["quarter"] = df.index.quarter.to_numpy().astype(np.int8)
+    features["hour_sin"] = np.sin(2 * np.pi * hour / 24)
+    features["hour_cos"] = np.cos(2 * np.pi * hour / 24)
+    features["day_sin"] = np.sin(2 * np.pi * day_of_week / 7)
+    features["day_cos"] = np.cos(2 * np.pi * day_of_week / 7)
+    features["month_sin"] = np.sin(2 * np.pi * month / 12)
+    features["month_cos"] = np.cos(2 * np.pi * month / 12)
+    features["is_tokyo_session"] = ((hour >= 0) & (hour < 9)).astype(np.int8)
+    features["is_london_session"] = ((hour >= 8) & (hour < 17)).astype(np.int8)
+    features["is_ny_session"] = ((hour >= 13) & (hour < 22)).astype(np.int8)
+    features["is_month_end"] = (df.index.day.to_numpy() >= 28).astype(np.int8)
+    features["is_friday"] = (day_of_week == 4).astype(np.int8)
+    features["is_monday"] = (day_of_week == 0).astype(np.int8)
+
+    # 複数の指標で共通の中間結果は一度だけ計算して使い回す
+    price = df["close"]
+    high = df["high"]
+    low = df["low"]
+    close = price.to_numpy(dtype=np.float64)
+    high_values = high.to_numpy(dtype=np.float64)
+    low_values = low.to_numpy(dtype=np.float64)
+    prev_close = price.shift(1).to_numpy(dtype=np.float64)
+    returns = price.pct_change()
+    delta = price.diff()
+    delta_values = delta.to_numpy(dtype=np.float64)
+    gains = np.clip(delta_values, 0, None)
+    losses = np.clip(-delta_values, 0, None)
+    # fmaxで欠損（先頭行の前日終値）を無視（pandasのmax(axis=1)と同じ）
+    tr = np.fmax(np.fmax(high_values - low_values, np.abs(high_values - prev_close)), np.abs(low_values - prev_close))
+    tp = (high + low + price) / 3
+    high_max = {period: high.rolling(period).max().to_numpy() for period in [5, 7, 9, 14, 21]}
+    low_min = {period: low.rolling(period).min().to_numpy() for period in [5, 7, 9, 14, 21]}
+
+    # ローリング平均・標準偏差は全ウィンドウ幅をカーネルで一括計算（統計量・ボリンジャーバンドで共用）
+    means, stds = rolling_mean_std(close, [10, 20, 30, 50, 100, 200])
+    sma = dict(zip([10, 20, 30, 50, 100, 200], means))
+    std = dict(zip([10, 20, 30, 50, 100, 200], stds))
+    skews, kurts = rolling_skew_kurt(returns.to_numpy(), [10, 30, 50, 100, 200])
+    skew = dict(zip([10, 30, 50, 100, 200], skews))
+    kurt = dict(zip([10, 30, 50, 100, 200], kurts))
+
+    # EMAは統計量・MACDで使う全スパンを終値の1回の走査でまとめて計算
+    ema_spans = [5, 10, 12, 19, 26, 30, 39, 50, 100, 200]
+    ema = dict(zip(ema_spans, ewm_mean(close, ema_spans)))
+
+    # ラグ特徴量（全ラグを1つの行列に並べ、リターンも全ラグまとめて計算）
+    lags = _missing_periods(existing, [1, 2, 3, 4, 6, 8, 12, 24, 48, 72, 96, 120, 168], "lag_close_{}h", "lag_return_{}h")
+    lagged = np.full((len(close), len(lags)), np.nan)
+    for i, lag in enumerate(lags):
+        lagged[lag:, i] = close[:max(len(close) - lag, 0)]
+    lag_returns = close[:, None] / lagged - 1
+    for i, lag in enumerate(lags):
+        features[f"lag_close_{lag}h"] = lagged[:, i]
+        features[f"lag_return_{lag}h"] = lag_returns[:, i]
+
+    # 追加ローリング統計量
+    stat_names = ["sma_{}_ext", "ema_{}_ext", "std_{}_ext", "range_{}_ext", "skew_{}", "kurtosis_{}", "zscore_{}"]
+    for w in _missing_periods(existing, [10, 30, 50, 100, 200], *stat_names):
+        features[f"sma_{w}_ext"] = sma[w]
+        features[f"ema_{w}_ext"] = ema[w]
+        features[f"std_{w}_ext"] = std[w]
+        features[f"range_{w}_ext"] = high.rolling(w).max() - low.rolling(w).min()
+        features[f"skew_{w}"] = skew[w]
+        features[f"kurtosis_{w}"] = kurt[w]
+        features[f"zscore_{w}"] = _evaluate("(c - m) / (s + 1e-10)", c=close, m=sma[w], s=std[w])
+
+    # MACD拡張
+    for fast, slow in _missing_periods(existing, [(5, 10), (12, 26), (19, 39)], "macd_{}_{}", "macd_signal_{}_{}"):
+        macd = ema[fast] - ema[slow]
+        features[f"macd_{fast}_{slow}"] = macd
+        features[f"macd_signal_{fast}_{slow}"] = ewm_mean(macd, [9])[0]
+
+    # ボリンジャーバンド
+    for w in _missing_periods(existing, [10, 20, 50], "bb_upper_{}", "bb_lower_{}", "bb_width_{}", "bb_pos_{}"):
+        bb_upper = _evaluate("m + 2 * s", m=sma[w], s=std[w])
+        bb_lower = _evaluate("m - 2 * s", m=sma[w], s=std[w])
+        features[f"bb_upper_{w}"] = bb_upper
+        features[f"bb_lower_{w}"] = bb_lower
+        features[f"bb_width_{w}"] = _evaluate("(u - l) / (m + 1e-10)", u=bb_upper, l=bb_lower, m=sma[w])
+        features[f"bb_pos_{w}"] = _evaluate("(c - l) / (u - l + 1e-10)", c=close, u=bb_upper, l=bb_lower)
+
+    # 追加RSI（Wilder平滑化）
+    for period in _missing_periods(existing, [5, 7, 9, 21, 28], "rsi_{}_ext"):
+        rs = wilder_mean(gains, period) / (wilder_mean(losses, period) + 1e-10)
+        features[f"rsi_{period}_ext"] = 100 - (100 / (1 + rs))
+
+    # ストキャスティクス
+    for period in _missing_periods(existing, [5, 9, 14, 21], "stoch_k_{}", "stoch_d_{}"):
+        stoch_k = _evaluate("100 * (c - lo) / (hi - lo + 1e-10)", c=close, lo=low_min[period], hi=high_max[period])
+        features[f"stoch_k_{period}"] = stoch_k
+        features[f"stoch_d_{period}"] = pd.Series(stoch_k).rolling(3).mean().to_numpy()
+
+    # Williams %R
+    for period in _missing_periods(existing, [7, 14, 21], "williams_r_{}"):
+        features[f"williams_r_{period}"] = _evaluate(
+            "-100 * (hi - c) / (hi - lo + 1e-10)", c=close, lo=low_min[period], hi=high_max[period]
+        )
+
+    # CCI（平均絶対偏差はウィンドウごとのPythonコールバックを使わずカーネルで計算）
+    cci_periods = _missing_periods(existing, [10, 14, 20], "cci_{}")
+    if cci_periods:
+        tp_values = tp.to_numpy(dtype=np.float64)
+        sma_tp, _ = rolling_mean_std(tp_values, cci_periods)
+        mad = rolling_mad(tp_values, cci_periods)
+        for i, period in enumerate(cci_periods):
+            features[f"cci_{period}"] = _evaluate("(tp - m) / (0.015 * d + 1e-10)", tp=tp_values, m=sma_tp[i], d=mad[i])
+
+    # ATR拡張
+    atr_means, _ = rolling_mean_std(tr, [7, 14, 21])
+    atr = dict(zip([7, 14, 21], atr_means))
+    for period in _missing_periods(existing, [7, 14, 21], "atr_{}_ext", "atr_pct_{}"):
+        features[f"atr_{period}_ext"] = atr[period]
+        features[f"atr_pct_{period}"] = atr[period] / close
+
+    # ADX
+    if not existing.issuperset(["adx", "plus_di", "minus_di", "di_diff"]):
+        # +DM/-DMはマスク代入せず配列のまま0でクリップ（-DMは符号を反転して正の値で扱う）
+        plus_dm = pd.Series(np.maximum(high.diff().to_numpy(), 0.0), index=df.index)
+        minus_dm = pd.Series(np.maximum(-low.diff().to_numpy(), 0.0), index=df.index)
+        plus_di = 100 * (plus_dm.rolling(14).mean() / (atr[14] + 1e-10))
+        minus_di = 100 * (minus_dm.rolling(14).mean() / (atr[14] + 1e-10))
+        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)
+        features["adx"] = dx.rolling(14).mean()
+        features["plus_di"] = plus_di
+        features["minus_di"] = minus_di
+        features["di_diff"] = plus_di - minus_di
+
+    # OBV（1パスのカーネルで累積し、移動平均・モメンタムも配列のまま計算）
+    if not existing.issuperset(["obv", "obv_sma_20", "obv_momentum"]):
+        obv = on_balance_volume(close, df["volume"].to_numpy(dtype=np.float64))
+        obv_momentum = np.full(len(obv), np.nan)
+        obv_momentum[20:] = obv[20:] - obv[:-20]
+        features["obv"] = obv
+        features["obv_sma_20"] = rolling_mean_std(obv, [20])[0][0]
+        features["obv_momentum"] = obv_momentum
+
+    # MFI (Money Flow Index)
+    if "mfi" not in existing:
+        mf = tp * df["volume"]
+        pos_mf = mf.where(tp > tp.shift(1), 0).rolling(14).sum()
+        neg_mf = mf.where(tp < tp.shift(1), 0).rolling(14).sum()
+        features["mfi"] = 100 - (100 / (1 + pos_mf / (neg_mf + 1e-10)))
+
+    # 生成した特徴量を一つのブロックとして既存データに結合
+    # （計算はfloat64で行い、保存する特徴量はfloat32に落としてメモリ・ファイルサイズを半減）
+    # （ブロックの一部の列だけが既存の場合も、既存列は元データの値を残して重複させない）
+    feature_df = pd.DataFrame({name: values for name, values in features.items() if name not in existing}, index=df.index)
+    feature_df = feature_df.astype({col: np.float32 for col in feature_df.select_dtypes(np.float64).columns})
+    df = pd.concat([df, feature_df], axis=1)
+    logger.info(f"  追加特徴量: {len(feature_df.columns)}")
+
+    # 全通貨ペア共通の特徴量（initializerで設定済み）
+    # 複数結合ではrsuffixが使えないため、既存列と重なる列だけ事前に接尾辞を付けてから
+    # 一度のjoinでまとめて結合する（インデックスの整列・再確保が1回で済む）
+    extras = []
+    existing = set(df.columns)
+    for key, suffix in [("cross", "_cross"), ("market", "_mkt"), ("crypto", "_crypto"),
+                        ("cot", "_cot"), ("trends", "_trends")]:
+        extra = _shared_features[key]
+        if extra.empty:
+            continue
+        extra = extra.rename(columns={col: f"{col}{suffix}" for col in extra.columns if col in existing})
+        existing.update(extra.columns)
+        extras.append(extra)
+    if extras:
+        df = df.join(extras, how="left")
+
+    # 欠損値・無限値処理
+    df = df.replace([np.inf, -np.inf], np.nan).ffill().bfill()
+
+    # 保存
+    output_file = ultimate_ml_dir / f"{instrument}_ultimate.parquet"
+    df.to_parquet(output_file, **PARQUET_OPTIONS)
+    logger.info(f"  保存: {df.shape}")
+
 
 def main():
     output_dir = Path("data/comprehensive")
@@ -25,17 +351,10 @@ def main():
     logger.info("="*70)
 
     # 収集済みデータ読み込み
-    cot_file = ultimate_dir / "cot_data/cot_positions.csv"
-    cot_data = pd.read_csv(cot_file, index_col=0, parse_dates=True) if cot_file.exists() else pd.DataFrame()
-
-    crypto_file = ultimate_dir / "crypto/crypto_data.csv"
-    crypto_data = pd.read_csv(crypto_file, index_col=0, parse_dates=True) if crypto_file.exists() else pd.DataFrame()
-
-    markets_file = ultimate_dir / "markets/global_markets.csv"
-    market_data = pd.read_csv(markets_file, index_col=0, parse_dates=True) if markets_file.exists() else pd.DataFrame()
-
-    trends_file = ultimate_dir / "google_trends/google_trends.csv"
-    trends_data = pd.read_csv(trends_file, index_col=0, parse_dates=True) if trends_file.exists() else pd.DataFrame()
+    cot_data = _read_csv_cached(ultimate_dir / "cot_data/cot_positions.csv")
+    crypto_data = _read_csv_cached(ultimate_dir / "crypto/crypto_data.csv")
+    market_data = _read_csv_cached(ultimate_dir / "markets/global_markets.csv")
+    trends_data = _read_csv_cached(ultimate_dir / "google_trends/google_trends.csv")
 
     logger.info(f"COT: {cot_data.shape}")
     logger.info(f"Crypto: {crypto_data.shape}")
@@ -52,190 +371,44 @@ def main():
     logger.info("\nクロス通貨特徴量生成...")
     price_dir = output_dir / "price_data"
     all_prices = {}
-    for pf in price_dir.glob("*_full_history.csv"):
+    for pf in sorted(price_dir.glob("*_full_history.parquet")):
         inst = pf.stem.replace("_full_history", "")
-        df = pd.read_csv(pf, index_col="time", parse_dates=True)
+        df = pd.read_parquet(pf, columns=["close"])
         df.index = df.index.tz_localize(None)
         all_prices[inst] = df["close"]
 
+    # 価格データが変わらない限り再計算しないよう、終値の内容をキーにキャッシュ
     prices_df = pd.DataFrame(all_prices)
-    returns = prices_df.pct_change()
-
-    cross_features = pd.DataFrame(index=prices_df.index)
-    for window in [24, 72, 168]:
-        pairs = [("USD_JPY", "EUR_USD"), ("USD_JPY", "GBP_USD"), ("EUR_USD", "GBP_USD")]
-        for p1, p2 in pairs:
-            if p1 in returns.columns and p2 in returns.columns:
-                cross_features[f"corr_{p1}_{p2}_{window}h"] = returns[p1].rolling(window).corr(returns[p2])
-
-    # USD/JPY 強度
-    usd_rets = [returns[p] for p in ["USD_JPY", "USD_CHF", "USD_CAD"] if p in returns.columns]
-    if usd_rets:
-        cross_features["usd_strength"] = pd.concat(usd_rets, axis=1).mean(axis=1).rolling(24).mean()
-
-    jpy_rets = [-returns[p] for p in ["USD_JPY", "EUR_JPY", "GBP_JPY"] if p in returns.columns]
-    if jpy_rets:
-        cross_features["jpy_strength"] = pd.concat(jpy_rets, axis=1).mean(axis=1).rolling(24).mean()
+    cross_features = cached_features(_cross_currency_features, prices_df, depends_on=(_rolling_corr,))
 
     logger.info(f"クロス通貨特徴量: {len(cross_features.columns)}")
 
     # 各通貨ペアのML Dataset生成
     ml_dir = output_dir / "ml_ready"
 
-    for ml_file in sorted(ml_dir.glob("*_ml_dataset.csv")):
-        instrument = ml_file.stem.replace("_ml_dataset", "")
-        logger.info(f"\n{instrument} の Ultimate Dataset 生成中...")
-
-        df = pd.read_csv(ml_file, index_col="time", parse_dates=True)
-        df.index = df.index.tz_localize(None)
-
-        # 時間特徴量
-        df["hour"] = df.index.hour
-        df["day_of_week"] = df.index.dayofweek
-        df["month"] = df.index.month
-        df["quarter"] = df.index.quarter
-        df["hour_sin"] = np.sin(2 * np.pi * df.index.hour / 24)
-        df["hour_cos"] = np.cos(2 * np.pi * df.index.hour / 24)
-        df["day_sin"] = np.sin(2 * np.pi * df.index.dayofweek / 7)
-        df["day_cos"] = np.cos(2 * np.pi * df.index.dayofweek / 7)
-        df["month_sin"] = np.sin(2 * np.pi * df.index.month / 12)
-        df["month_cos"] = np.cos(2 * np.pi * df.index.month / 12)
-        df["is_tokyo_session"] = ((df.index.hour >= 0) & (df.index.hour < 9)).astype(int)
-        df["is_london_session"] = ((df.index.hour >= 8) & (df.index.hour < 17)).astype(int)
-        df["is_ny_session"] = ((df.index.hour >= 13) & (df.index.hour < 22)).astype(int)
-        df["is_month_end"] = (df.index.day >= 28).astype(int)
-        df["is_friday"] = (df.index.dayofweek == 4).astype(int)
-        df["is_monday"] = (df.index.dayofweek == 0).astype(int)
-
-        # ラグ特徴量
-        for lag in [1, 2, 3, 4, 6, 8, 12, 24, 48, 72, 96, 120, 168]:
-            df[f"lag_close_{lag}h"] = df["close"].shift(lag)
-            df[f"lag_return_{lag}h"] = df["close"].pct_change(lag)
-
-        # 追加ローリング統計量
-        for w in [10, 30, 50, 100, 200]:
-            df[f"sma_{w}_ext"] = df["close"].rolling(w).mean()
-            df[f"ema_{w}_ext"] = df["close"].ewm(span=w).mean()
-            df[f"std_{w}_ext"] = df["close"].rolling(w).std()
-            df[f"range_{w}_ext"] = df["high"].rolling(w).max() - df["low"].rolling(w).min()
-            df[f"skew_{w}"] = df["close"].pct_change().rolling(w).skew()
-            df[f"kurtosis_{w}"] = df["close"].pct_change().rolling(w).kurt()
-            df[f"zscore_{w}"] = (df["close"] - df[f"sma_{w}_ext"]) / (df[f"std_{w}_ext"] + 1e-10)
-
-        # MACD拡張
-        for fast, slow in [(5, 10), (12, 26), (19, 39)]:
-            ema_fast = df["close"].ewm(span=fast).mean()
-            ema_slow = df["close"].ewm(span=slow).mean()
-            df[f"macd_{fast}_{slow}"] = ema_fast - ema_slow
-            df[f"macd_signal_{fast}_{slow}"] = df[f"macd_{fast}_{slow}"].ewm(span=9).mean()
-
-        # ボリンジャーバンド
-        for w in [10, 20, 50]:
-            sma = df["close"].rolling(w).mean()
-            std = df["close"].rolling(w).std()
-            df[f"bb_upper_{w}"] = sma + 2 * std
-            df[f"bb_lower_{w}"] = sma - 2 * std
-            df[f"bb_width_{w}"] = (df[f"bb_upper_{w}"] - df[f"bb_lower_{w}"]) / (sma + 1e-10)
-            df[f"bb_pos_{w}"] = (df["close"] - df[f"bb_lower_{w}"]) / (df[f"bb_upper_{w}"] - df[f"bb_lower_{w}"] + 1e-10)
-
-        # 追加RSI
-        for period in [5, 7, 9, 21, 28]:
-            delta = df["close"].diff()
-            gain = delta.where(delta > 0, 0).rolling(period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
-            df[f"rsi_{period}_ext"] = 100 - (100 / (1 + gain / (loss + 1e-10)))
-
-        # ストキャスティクス
-        for period in [5, 9, 14, 21]:
-            low_min = df["low"].rolling(period).min()
-            high_max = df["high"].rolling(period).max()
-            df[f"stoch_k_{period}"] = 100 * (df["close"] - low_min) / (high_max - low_min + 1e-10)
-            df[f"stoch_d_{period}"] = df[f"stoch_k_{period}"].rolling(3).mean()
-
-        # Williams %R
-        for period in [7, 14, 21]:
-            high_max = df["high"].rolling(period).max()
-            low_min = df["low"].rolling(period).min()
-            df[f"williams_r_{period}"] = -100 * (high_max - df["close"]) / (high_max - low_min + 1e-10)
-
-        # CCI
-        for period in [10, 14, 20]:
-            tp = (df["high"] + df["low"] + df["close"]) / 3
-            sma_tp = tp.rolling(period).mean()
-            mad = tp.rolling(period).apply(lambda x: np.abs(x - x.mean()).mean())
-            df[f"cci_{period}"] = (tp - sma_tp) / (0.015 * mad + 1e-10)
-
-        # ATR拡張
-        for period in [7, 14, 21]:
-            high_low = df["high"] - df["low"]
-            high_close = abs(df["high"] - df["close"].shift(1))
-            low_close = abs(df["low"] - df["close"].shift(1))
-            tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-            df[f"atr_{period}_ext"] = tr.rolling(period).mean()
-            df[f"atr_pct_{period}"] = df[f"atr_{period}_ext"] / df["close"]
-
-        # ADX
-        plus_dm = df["high"].diff()
-        minus_dm = df["low"].diff()
-        plus_dm[plus_dm < 0] = 0
-        minus_dm[minus_dm > 0] = 0
-        tr = pd.concat([
-            df["high"] - df["low"],
-            abs(df["high"] - df["close"].shift(1)),
-            abs(df["low"] - df["close"].shift(1))
-        ], axis=1).max(axis=1)
-        atr = tr.rolling(14).mean()
-        plus_di = 100 * (plus_dm.rolling(14).mean() / (atr + 1e-10))
-        minus_di = 100 * (abs(minus_dm).rolling(14).mean() / (atr + 1e-10))
-        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)
-        df["adx"] = dx.rolling(14).mean()
-        df["plus_di"] = plus_di
-        df["minus_di"] = minus_di
-        df["di_diff"] = plus_di - minus_di
-
-        # OBV
-        obv = (np.sign(df["close"].diff()) * df["volume"]).fillna(0).cumsum()
-        df["obv"] = obv
-        df["obv_sma_20"] = obv.rolling(20).mean()
-        df["obv_momentum"] = obv - obv.shift(20)
-
-        # MFI (Money Flow Index)
-        tp = (df["high"] + df["low"] + df["close"]) / 3
-        mf = tp * df["volume"]
-        pos_mf = mf.where(tp > tp.shift(1), 0).rolling(14).sum()
-        neg_mf = mf.where(tp < tp.shift(1), 0).rolling(14).sum()
-        df["mfi"] = 100 - (100 / (1 + pos_mf / (neg_mf + 1e-10)))
-
-        # クロス通貨特徴量
-        df = df.join(cross_features, how="left", rsuffix="_cross")
-
-        # 追加市場データ
-        if not market_hourly.empty:
-            df = df.join(market_hourly, how="left", rsuffix="_mkt")
-
-        # 暗号通貨データ
-        if not crypto_hourly.empty:
-            df = df.join(crypto_hourly, how="left", rsuffix="_crypto")
-
-        # COTデータ
-        if not cot_hourly.empty:
-            df = df.join(cot_hourly, how="left", rsuffix="_cot")
-
-        # Google Trends
-        if not trends_hourly.empty:
-            df = df.join(trends_hourly, how="left", rsuffix="_trends")
-
-        # 欠損値・無限値処理
-        df = df.replace([np.inf, -np.inf], np.nan).ffill().bfill()
-
-        # 保存
-        output_file = ultimate_ml_dir / f"{instrument}_ultimate.csv"
-        df.to_csv(output_file)
-        logger.info(f"  保存: {df.shape}")
-
-    # 統計表示
-    sample = pd.read_csv(ultimate_ml_dir / "USD_JPY_ultimate.csv", index_col=0, nrows=10)
-    total_size = sum(os.path.getsize(f) for f in ultimate_ml_dir.glob("*.csv"))
+    # 通貨ペアごとの特徴量生成は互いに独立したCPU処理なのでプロセス並列で実行
+    # （共通特徴量はfloat32に変換してからinitializerで各ワーカーに一度だけ渡す）
+    shared_features = {
+        "cross": cross_features.astype(np.float32),
+        "market": market_hourly.astype(np.float32),
+        "crypto": crypto_hourly.astype(np.float32),
+        "cot": cot_hourly.astype(np.float32),
+        "trends": trends_hourly.astype(np.float32),
+    }
+    ml_files = sorted(ml_dir.glob("*_ml_dataset.parquet"))
+    if ml_files:
+        with ProcessPoolExecutor(
+            max_workers=min(len(ml_files), os.cpu_count() or 1),
+            initializer=_init_worker,
+            initargs=(shared_features,)
+        ) as executor:
+            futures = [executor.submit(_build_ultimate_dataset, ml_file, ultimate_ml_dir) for ml_file in ml_files]
+            for future in as_completed(futures):
+                future.result()
+
+    # 統計表示（列一覧はデータを読まずParquetのスキーマから取得）
+    sample = pq.read_schema(ultimate_ml_dir / "USD_JPY_ultimate.parquet").empty_table().to_pandas()
+    total_size = sum(os.path.getsize(f) for f in ultimate_ml_dir.glob("*.parquet"))
 
     logger.info("\n" + "="*70)
     logger.info("Ultimate ML Dataset 完成!")
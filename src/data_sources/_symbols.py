@@ -0,0 +1,30 @@
+"""
+通貨ペア表記とYahoo Financeティッカーの変換
+"""
+from functools import lru_cache
+
+YAHOO_FX_SUFFIX = "=X"
+
+
+@lru_cache(maxsize=64)
+def pair_to_ticker(pair: str) -> str:
+    """
+    通貨ペアをYahoo Financeティッカーに変換
+
+    Args:
+        pair: USD/JPY・USD_JPY・USDJPY形式（USDJPY=X形式はそのまま返す）
+
+    Returns:
+        Yahoo Financeティッカー (例: USDJPY=X)
+    """
+    if pair.endswith(YAHOO_FX_SUFFIX):
+        return pair
+
+    # USD/JPY -> USDJPY=X
+    # Yahoo Financeでは逆順（JPY=X）ではなくベース・クオートの順に=Xを付ける
+    return f"{pair.replace('/', '').replace('_', '')}{YAHOO_FX_SUFFIX}"
+
+
+def pair_to_symbol(pair: str) -> str:
+    """区切り・=Xを除いた通貨ペア名（例: USDJPY、保存ファイル名用）"""
+    return pair_to_ticker(pair)[:-len(YAHOO_FX_SUFFIX)]
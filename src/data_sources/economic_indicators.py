@@ -6,7 +6,8 @@ FRED API（Federal Reserve Economic Data）から経済指標を取得
 import pandas as pd
 from datetime import datetime, timedelta
 from loguru import logger
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 
 
@@ -17,6 +18,12 @@ class EconomicIndicators:
     FRED API使用（無料）
     """
 
+    # 指標グループごとの 列名 -> FREDシリーズID
+    # 日本の政策金利はFREDで直接取得できない（基本的にゼロ金利）ため10年国債利回りで代替
+    RATE_SERIES = {'us_fed_rate': 'FEDFUNDS', 'jp_rate': 'IRLTLT01JPM156N'}
+    INFLATION_SERIES = {'us_cpi': 'CPIAUCSL', 'jp_cpi': 'JPNCPIALLMINMEI'}
+    UNEMPLOYMENT_SERIES = {'us_unemployment': 'UNRATE', 'jp_unemployment': 'LRHUTTTTJPM156S'}
+
     def __init__(self, api_key: Optional[str] = None):
         """
         Args:
@@ -70,36 +77,11 @@ class EconomicIndicators:
         if not self.fred:
             return self._generate_demo_rates(start_date, end_date)
 
-        try:
-            # 米国政策金利（Federal Funds Rate）
-            us_rate = self.fred.get_series('FEDFUNDS', start_date, end_date)
-
-            # 日本政策金利（代替: 日本の短期金利）
-            # FRED APIでは日本の政策金利は直接取得不可（基本的にゼロ金利）
-            # 10年国債利回りを使用
-            jp_rate = self.fred.get_series('IRLTLT01JPM156N', start_date, end_date)
-
-            # データフレーム化
-            df = pd.DataFrame({
-                'us_fed_rate': us_rate,
-                'jp_rate': jp_rate
-            })
-
-            # 金利差（USD_JPYの主要ドライバー）
-            df['rate_differential'] = df['us_fed_rate'] - df['jp_rate']
-
-            # 変化率
-            df['us_rate_change'] = df['us_fed_rate'].diff()
-            df['jp_rate_change'] = df['jp_rate'].diff()
-
-            df = df.fillna(method='ffill').fillna(0)
-
-            logger.info(f"金利データ取得: {len(df)}件")
-            return df
-
-        except Exception as e:
-            logger.error(f"金利データ取得エラー: {e}")
-            return self._generate_demo_rates(start_date, end_date)
+        fetched = self._fetch_series(self.RATE_SERIES.values(), start_date, end_date)
+        return self._build_indicator(
+            '金利', self.RATE_SERIES, self._derive_rates, self._generate_demo_rates,
+            fetched, start_date, end_date
+        )
 
     def get_inflation_data(
         self,
@@ -119,30 +101,11 @@ class EconomicIndicators:
         if not self.fred:
             return self._generate_demo_inflation(start_date, end_date)
 
-        try:
-            # 米国CPI
-            us_cpi = self.fred.get_series('CPIAUCSL', start_date, end_date)
-
-            # 日本CPI
-            jp_cpi = self.fred.get_series('JPNCPIALLMINMEI', start_date, end_date)
-
-            df = pd.DataFrame({
-                'us_cpi': us_cpi,
-                'jp_cpi': jp_cpi
-            })
-
-            # 前年同月比（YoY）
-            df['us_cpi_yoy'] = df['us_cpi'].pct_change(12) * 100
-            df['jp_cpi_yoy'] = df['jp_cpi'].pct_change(12) * 100
-
-            df = df.fillna(method='ffill').fillna(0)
-
-            logger.info(f"インフレデータ取得: {len(df)}件")
-            return df
-
-        except Exception as e:
-            logger.error(f"インフレデータ取得エラー: {e}")
-            return self._generate_demo_inflation(start_date, end_date)
+        fetched = self._fetch_series(self.INFLATION_SERIES.values(), start_date, end_date)
+        return self._build_indicator(
+            'インフレ', self.INFLATION_SERIES, self._derive_inflation, self._generate_demo_inflation,
+            fetched, start_date, end_date
+        )
 
     def get_unemployment_rate(
         self,
@@ -162,30 +125,11 @@ class EconomicIndicators:
         if not self.fred:
             return self._generate_demo_unemployment(start_date, end_date)
 
-        try:
-            # 米国失業率
-            us_unemp = self.fred.get_series('UNRATE', start_date, end_date)
-
-            # 日本失業率
-            jp_unemp = self.fred.get_series('LRHUTTTTJPM156S', start_date, end_date)
-
-            df = pd.DataFrame({
-                'us_unemployment': us_unemp,
-                'jp_unemployment': jp_unemp
-            })
-
-            # 変化
-            df['us_unemp_change'] = df['us_unemployment'].diff()
-            df['jp_unemp_change'] = df['jp_unemployment'].diff()
-
-            df = df.fillna(method='ffill').fillna(0)
-
-            logger.info(f"失業率データ取得: {len(df)}件")
-            return df
-
-        except Exception as e:
-            logger.error(f"失業率データ取得エラー: {e}")
-            return self._generate_demo_unemployment(start_date, end_date)
+        fetched = self._fetch_series(self.UNEMPLOYMENT_SERIES.values(), start_date, end_date)
+        return self._build_indicator(
+            '失業率', self.UNEMPLOYMENT_SERIES, self._derive_unemployment, self._generate_demo_unemployment,
+            fetched, start_date, end_date
+        )
 
     def get_all_indicators(
         self,
@@ -200,22 +144,156 @@ class EconomicIndicators:
         """
         logger.info("経済指標データ取得中...")
 
-        # 各指標を取得
-        rates = self.get_interest_rates(start_date, end_date)
-        inflation = self.get_inflation_data(start_date, end_date)
-        unemployment = self.get_unemployment_rate(start_date, end_date)
+        if self.fred:
+            # 6系列を指標ごとに順番に取得せず、1回の並列バッチでまとめて取得
+            series_ids = [
+                *self.RATE_SERIES.values(),
+                *self.INFLATION_SERIES.values(),
+                *self.UNEMPLOYMENT_SERIES.values(),
+            ]
+            fetched = self._fetch_series(series_ids, start_date, end_date)
+
+            rates = self._build_indicator(
+                '金利', self.RATE_SERIES, self._derive_rates, self._generate_demo_rates,
+                fetched, start_date, end_date
+            )
+            inflation = self._build_indicator(
+                'インフレ', self.INFLATION_SERIES, self._derive_inflation, self._generate_demo_inflation,
+                fetched, start_date, end_date
+            )
+            unemployment = self._build_indicator(
+                '失業率', self.UNEMPLOYMENT_SERIES, self._derive_unemployment, self._generate_demo_unemployment,
+                fetched, start_date, end_date
+            )
+        else:
+            rates = self._generate_demo_rates(start_date, end_date)
+            inflation = self._generate_demo_inflation(start_date, end_date)
+            unemployment = self._generate_demo_unemployment(start_date, end_date)
 
         # 統合（外部結合して全期間をカバー）
         combined = rates.join(inflation, how='outer')
         combined = combined.join(unemployment, how='outer')
 
         # 欠損値を前方・後方埋め
-        combined = combined.fillna(method='ffill').fillna(method='bfill')
+        combined = combined.ffill().bfill()
 
         logger.info(f"経済指標統合完了: {len(combined.columns)}個の指標")
 
         return combined
 
+    @staticmethod
+    def ewm_time(series: pd.Series, halflife_days: float) -> pd.Series:
+        """
+        日付インデックスの指標を半減期（日数）で指数平滑化
+
+        月次・日次が混在する指標でも経過時間で減衰させる。
+        ewm(halflife=..., times=...)はO(N²)のため、O(N)の漸化式で計算する
+
+        Args:
+            series: DatetimeIndexを持つ指標（例: rate_differential）
+            halflife_days: 半減期（日）
+
+        Returns:
+            平滑化した指標
+        """
+        # numbaのカーネルは使う時だけ読み込む（データソースのインポートを軽く保つ）
+        from ..tools import ewm_time_mean
+
+        times = series.index.as_unit('ns').asi8
+        smoothed = ewm_time_mean(series.to_numpy(dtype='float64'), times, halflife_days * 86400 * 1e9)
+        return pd.Series(smoothed, index=series.index, name=series.name)
+
+    def _fetch_series(
+        self,
+        series_ids: Iterable[str],
+        start_date: str,
+        end_date: Optional[str]
+    ) -> Dict[str, object]:
+        """
+        FREDシリーズを並列取得
+
+        待ち時間の大半はHTTP応答待ちのため、スレッドで同時に発行する
+
+        Returns:
+            シリーズID -> Series（取得に失敗したシリーズは例外オブジェクト）
+        """
+        series_ids = list(series_ids)
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=min(len(series_ids), 8)) as executor:
+            futures = {
+                executor.submit(self.fred.get_series, series_id, start_date, end_date): series_id
+                for series_id in series_ids
+            }
+            for future in as_completed(futures):
+                series_id = futures[future]
+                try:
+                    fetched[series_id] = future.result()
+                except Exception as e:
+                    fetched[series_id] = e
+        return fetched
+
+    def _build_indicator(
+        self,
+        label: str,
+        columns: Dict[str, str],
+        derive: Callable[[pd.DataFrame], pd.DataFrame],
+        demo: Callable[[str, Optional[str]], pd.DataFrame],
+        fetched: Dict[str, object],
+        start_date: str,
+        end_date: Optional[str]
+    ) -> pd.DataFrame:
+        """
+        取得済みシリーズから指標グループのDataFrameを作成
+
+        いずれかのシリーズが取得できなかった場合はデモデータを返す
+        """
+        try:
+            data = {}
+            for column, series_id in columns.items():
+                series = fetched[series_id]
+                if isinstance(series, Exception):
+                    raise series
+                data[column] = series
+
+            df = derive(pd.DataFrame(data))
+
+            logger.info(f"{label}データ取得: {len(df)}件")
+            return df
+
+        except Exception as e:
+            logger.error(f"{label}データ取得エラー: {e}")
+            return demo(start_date, end_date)
+
+    @staticmethod
+    def _derive_rates(df: pd.DataFrame) -> pd.DataFrame:
+        """金利データに派生指標を追加"""
+        # 金利差（USD_JPYの主要ドライバー）
+        df['rate_differential'] = df['us_fed_rate'] - df['jp_rate']
+
+        # 変化率
+        df['us_rate_change'] = df['us_fed_rate'].diff()
+        df['jp_rate_change'] = df['jp_rate'].diff()
+
+        return df.ffill().fillna(0)
+
+    @staticmethod
+    def _derive_inflation(df: pd.DataFrame) -> pd.DataFrame:
+        """インフレデータに派生指標を追加"""
+        # 前年同月比（YoY）
+        df['us_cpi_yoy'] = df['us_cpi'].pct_change(12) * 100
+        df['jp_cpi_yoy'] = df['jp_cpi'].pct_change(12) * 100
+
+        return df.ffill().fillna(0)
+
+    @staticmethod
+    def _derive_unemployment(df: pd.DataFrame) -> pd.DataFrame:
+        """失業率データに派生指標を追加"""
+        # 変化
+        df['us_unemp_change'] = df['us_unemployment'].diff()
+        df['jp_unemp_change'] = df['jp_unemployment'].diff()
+
+        return df.ffill().fillna(0)
+
     def _generate_demo_rates(self, start_date: str, end_date: Optional[str]) -> pd.DataFrame:
         """デモ用金利データ"""
         import numpy as np
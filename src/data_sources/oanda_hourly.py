@@ -6,10 +6,11 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from loguru import logger
 import pandas as pd
-import time
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
 
 from ..api.oanda_client import OandaClient
+from ..tools import OANDA_BUCKET, downcast_prices, load_frame, save_frame
 
 
 class OandaHourlyData:
@@ -34,7 +35,8 @@ class OandaHourlyData:
         self,
         instrument: str = 'USD_JPY',
         days: int = 730,  # 2年分
-        save: bool = True
+        save: bool = True,
+        save_format: str = 'feather'
     ) -> pd.DataFrame:
         """
         大量の時間足データを取得（最新のcountデータのみ）
@@ -45,7 +47,10 @@ class OandaHourlyData:
         Args:
             instrument: 通貨ペア
             days: 取得日数（デフォルト730日 = 2年）
-            save: CSVに保存するか
+            save: 保存するか
+            save_format: 保存形式
+                - feather: 後続処理ですぐ読み込む受け渡し用（読み込みが速い）
+                - parquet: 長期保存用
 
         Returns:
             時間足データのDataFrame
@@ -55,6 +60,7 @@ class OandaHourlyData:
         # まず最新500本を取得
         try:
             logger.info("最新データを取得中...")
+            OANDA_BUCKET.acquire()  # API制限（ホスト単位のトークンバケット）
             df = self.client.get_historical_data(
                 instrument=instrument,
                 granularity=self.granularity,
@@ -69,11 +75,13 @@ class OandaHourlyData:
             logger.info(f"⚠️ OANDA APIの制限により、最新500本のみ取得")
             logger.info(f"💡 より長期データが必要な場合は、Yahoo Financeを検討してください")
 
+            # 価格列はfloat32で保持・保存
+            df = downcast_prices(df)
+
             # 保存
             if save:
-                filename = f"{instrument}_{self.granularity}_latest.csv"
-                filepath = self.data_dir / filename
-                df.to_csv(filepath)
+                filename = f"{instrument}_{self.granularity}_latest"
+                filepath = save_frame(df, self.data_dir / filename, save_format)
                 logger.info(f"💾 保存: {filepath}")
 
             return df
@@ -114,38 +122,55 @@ class OandaHourlyData:
         """
         logger.info(f"複数通貨ペアデータ取得開始: {len(instruments)}ペア")
 
-        results = {}
-        for instrument in instruments:
-            try:
-                logger.info(f"\n{'='*60}")
-                logger.info(f"通貨ペア: {instrument}")
-                logger.info(f"{'='*60}")
-
-                df = self.get_hourly_data(
-                    instrument=instrument,
-                    days=days,
-                    save=True
-                )
-                results[instrument] = df
+        # I/O待ちが支配的なので通貨ペア単位で並列取得（QPSはOANDA_BUCKETで制御）
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=min(len(instruments), 4) or 1) as executor:
+            futures = {
+                executor.submit(self.get_hourly_data, instrument=instrument, days=days, save=True): instrument
+                for instrument in instruments
+            }
 
-                # 通貨ペア間で1秒待機（APIレート制限）
-                time.sleep(1)
+            for future in as_completed(futures):
+                instrument = futures[future]
+                try:
+                    fetched[instrument] = future.result()
+                except Exception as e:
+                    logger.error(f"{instrument} のデータ取得に失敗: {e}")
 
-            except Exception as e:
-                logger.error(f"{instrument} のデータ取得に失敗: {e}")
-                continue
+        # 結果は指定した通貨ペアの順に並べる
+        results = {instrument: fetched[instrument] for instrument in instruments if instrument in fetched}
 
         logger.info(f"\n✅ 複数通貨ペアデータ取得完了: {len(results)}/{len(instruments)}ペア")
         return results
 
-    def load_saved_data(self, instrument: str, days: int = 730) -> Optional[pd.DataFrame]:
-        """保存済みデータを読み込み"""
-        filename = f"{instrument}_{self.granularity}_{days}days.csv"
+    def load_saved_data(
+        self,
+        instrument: str,
+        days: int = 730,
+        mmap: bool = True,
+        columns: Optional[List[str]] = None,
+        date_range: Optional[Tuple[str, str]] = None,
+        file_format: str = 'auto'
+    ) -> Optional[pd.DataFrame]:
+        """
+        保存済みデータを読み込み
+
+        Args:
+            mmap: メモリマップで開くか
+            columns: 読み込む列（例: ['close']、Noneなら全列）
+            date_range: (開始, 終了) 読み込む期間（両端を含む）
+            file_format: auto（Feather・Parquetのうち新しい方）・feather・parquet
+        """
+        filename = f"{instrument}_{self.granularity}_{days}days"
         filepath = self.data_dir / filename
 
-        if filepath.exists():
+        # DatetimeIndexはParquet・Featherからそのまま復元される（旧形式のCSVのみ日時を解析）
+        df = load_frame(
+            filepath, index_col='time', memory_map=mmap, columns=columns, date_range=date_range,
+            file_format=file_format
+        )
+        if df is not None:
             logger.info(f"保存済みデータ読み込み: {filepath}")
-            df = pd.read_csv(filepath, index_col='time', parse_dates=True)
             logger.info(f"✅ 読み込み完了: {len(df)}本")
             return df
         else:
@@ -184,7 +209,9 @@ def collect_all_hourly_data():
         logger.info(f"{instrument}:")
         logger.info(f"  ローソク足数: {len(df)}")
         logger.info(f"  期間: {df.index.min()} ~ {df.index.max()}")
-        logger.info(f"  完全性: {(1 - df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100:.1f}%")
+        missing = int(df.isna().to_numpy().sum())
+        completeness = (1 - missing / df.size) * 100
+        logger.info(f"  完全性: {completeness:.1f}%")
 
     logger.info("\n✅ すべてのデータ収集完了！")
     return results
@@ -1,12 +1,57 @@
 """
 センチメント分析モジュール (FinBERT)
+
+torch・transformersは読み込みに時間がかかるため、SentimentAnalyzerの生成時に初めてインポートする
+（SentimentBatch・LABELSだけを使う場合や、このモジュールを読み込むだけのデータ収集では読み込まない）
 """
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
 import numpy as np
-from typing import List, Dict, Union
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Union
 from loguru import logger
 
+if TYPE_CHECKING:
+    import torch
+
+# ラベル（SentimentBatch.label はこのタプルのインデックス）
+LABELS = ('positive', 'neutral', 'negative')
+
+
+@dataclass
+class SentimentBatch:
+    """
+    複数テキストのセンチメント結果
+
+    テキストごとの辞書ではなく、項目ごとの配列（テキスト順）で保持する
+    """
+    positive: np.ndarray
+    neutral: np.ndarray
+    negative: np.ndarray
+    sentiment_score: np.ndarray  # -1 ~ 1
+    label: np.ndarray  # LABELS のインデックス (int8)
+
+    def __len__(self) -> int:
+        return len(self.sentiment_score)
+
+    def as_dicts(self) -> List[Dict]:
+        """テキストごとの辞書のリストに変換"""
+        return [
+            {
+                'positive': float(positive),
+                'neutral': float(neutral),
+                'negative': float(negative),
+                'sentiment_score': float(score),
+                'label': LABELS[label]
+            }
+            for positive, neutral, negative, score, label in zip(
+                self.positive, self.neutral, self.negative, self.sentiment_score, self.label
+            )
+        ]
+
 
 class SentimentAnalyzer:
     """
@@ -18,23 +63,58 @@ class SentimentAnalyzer:
     - Negative (ネガティブ): -1
     """
 
-    def __init__(self, model_name: str = "ProsusAI/finbert"):
+    def __init__(self, model_name: str = "ProsusAI/finbert", precision: str = "auto"):
         """
         Args:
             model_name: 使用するモデル名 (デフォルト: FinBERT)
+            precision: 推論精度
+                - auto: GPUならfp16、CPUならint8
+                - fp32: 変換しない
+                - fp16: 半精度 (GPUのみ)
+                - int8: Linear層の動的量子化 (CPUのみ)
         """
+        if precision not in ("auto", "fp32", "fp16", "int8"):
+            raise ValueError(f"未対応のprecision: {precision}")
+
         logger.info(f"センチメント分析モデルを読み込み中: {model_name}")
 
         try:
+            import torch
+            import torch.utils.data
+            from transformers import AutoTokenizer, AutoModelForSequenceClassification
+            self.torch = torch
+
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            # 繰り返し取得される同じ記事はトークン化し直さない（インスタンスごとのLRUキャッシュ）
+            self._tokenize_one = lru_cache(maxsize=8192)(self._encode)
             self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
             self.model.eval()
 
             # GPU利用可能なら使用
             self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+            # 推論はGEMMが支配的なため、重みを小さい型にしてメモリ帯域・演算量を削減
+            # （分類ラベルへの影響はごく僅か）
+            if precision == "auto":
+                precision = "fp16" if self.device.type == 'cuda' else "int8"
+            if precision == "fp16" and self.device.type != 'cuda':
+                logger.warning("fp16はGPUのみ対応のためfp32で推論します")
+                precision = "fp32"
+            if precision == "int8" and self.device.type != 'cpu':
+                logger.warning("int8の動的量子化はCPUのみ対応のためfp32で推論します")
+                precision = "fp32"
+
+            if precision == "int8":
+                self.model = torch.ao.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            elif precision == "fp16":
+                # input_ids・attention_maskは整数のまま渡す（埋め込み以降がfp16で計算される）
+                self.model.half()
             self.model.to(self.device)
+            self.precision = precision
 
-            logger.info(f"モデル読み込み完了 (device: {self.device})")
+            logger.info(f"モデル読み込み完了 (device: {self.device}, precision: {precision})")
 
         except Exception as e:
             logger.error(f"モデル読み込みエラー: {e}")
@@ -56,68 +136,9 @@ class SentimentAnalyzer:
                 'label': str
             }
         """
-        if not text or len(text.strip()) == 0:
-            return {
-                'positive': 0.0,
-                'neutral': 1.0,
-                'negative': 0.0,
-                'sentiment_score': 0.0,
-                'label': 'neutral'
-            }
-
-        try:
-            # トークン化
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-            # 予測
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-
-            predictions = predictions.cpu().numpy()[0]
-
-            # FinBERT の出力: [positive, negative, neutral]
-            positive = float(predictions[0])
-            negative = float(predictions[1])
-            neutral = float(predictions[2])
-
-            # センチメントスコア計算 (-1 ~ 1)
-            sentiment_score = positive - negative
+        return self.analyze_batch([text]).as_dicts()[0]
 
-            # ラベル
-            if sentiment_score > 0.1:
-                label = 'positive'
-            elif sentiment_score < -0.1:
-                label = 'negative'
-            else:
-                label = 'neutral'
-
-            return {
-                'positive': positive,
-                'neutral': neutral,
-                'negative': negative,
-                'sentiment_score': sentiment_score,
-                'label': label
-            }
-
-        except Exception as e:
-            logger.error(f"センチメント分析エラー: {e}")
-            return {
-                'positive': 0.0,
-                'neutral': 1.0,
-                'negative': 0.0,
-                'sentiment_score': 0.0,
-                'label': 'neutral'
-            }
-
-    def analyze_batch(self, texts: List[str], batch_size: int = 8) -> List[Dict]:
+    def analyze_batch(self, texts: List[str], batch_size: int = 8) -> SentimentBatch:
         """
         複数テキストのバッチ処理
 
@@ -126,23 +147,85 @@ class SentimentAnalyzer:
             batch_size: バッチサイズ
 
         Returns:
-            センチメント結果のリスト
+            センチメント結果（テキスト順の配列、辞書のリストは as_dicts() で取得）
         """
-        results = []
-
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-
-            for text in batch:
-                result = self.analyze_text(text)
-                results.append(result)
-
-        return results
+        # 空のテキスト・分析に失敗したバッチは中立のまま（空のテキストはモデルに通さない）
+        # FinBERT の出力: [positive, negative, neutral]
+        probs = np.zeros((len(texts), 3))
+        probs[:, 2] = 1.0
+        indices = [i for i, text in enumerate(texts) if text and len(text.strip()) > 0]
+
+        # 次のバッチのパディング（CPU）を前のバッチの順伝播（GPU）と重ねるため、
+        # GPUではピン留めメモリから非同期転送し、結果の取り出しはすべて投入した後にまとめて行う
+        loader = self.torch.utils.data.DataLoader(
+            indices,
+            batch_size=batch_size,
+            collate_fn=self._collate(texts),
+            pin_memory=self.device.type == 'cuda'
+        )
+        pending = []
+        for batch_indices, inputs in loader:
+            if inputs is None:
+                continue
+            try:
+                inputs = {k: v.to(self.device, non_blocking=True) for k, v in inputs.items()}
+
+                with self.torch.inference_mode():
+                    outputs = self.model(**inputs)
+                    # fp16推論でも確率はfp32で計算
+                    predictions = self.torch.nn.functional.softmax(outputs.logits.float(), dim=-1)
+
+                pending.append((batch_indices, predictions))
+
+            except Exception as e:
+                logger.error(f"センチメント分析エラー: {e}")
+
+        for batch_indices, predictions in pending:
+            probs[batch_indices] = predictions.cpu().numpy()
+
+        # センチメントスコア計算 (-1 ~ 1) とラベル
+        sentiment_score = probs[:, 0] - probs[:, 1]
+        label = np.where(sentiment_score > 0.1, 0, np.where(sentiment_score < -0.1, 2, 1)).astype(np.int8)
+
+        return SentimentBatch(
+            positive=probs[:, 0],
+            neutral=probs[:, 2],
+            negative=probs[:, 1],
+            sentiment_score=sentiment_score,
+            label=label
+        )
+
+    def _collate(self, texts: List[str]):
+        """テキストのインデックスのバッチを (インデックス, パディング済み入力) に変換するcollate_fn"""
+        def collate(batch_indices: List[int]) -> Tuple[List[int], Optional[Dict[str, "torch.Tensor"]]]:
+            # キャッシュ済みのトークン列をパディングして [B, seq] の1回の順伝播で予測
+            try:
+                return batch_indices, self._pad([self._tokenize_one(texts[i]) for i in batch_indices])
+            except Exception as e:
+                # トークン化に失敗したバッチは中立のまま残りのバッチを続ける
+                logger.error(f"センチメント分析エラー: {e}")
+                return batch_indices, None
+        return collate
+
+    def _encode(self, text: str) -> Tuple[int, ...]:
+        """テキストをトークンID列に変換（512トークンで切り詰め）"""
+        return tuple(self.tokenizer(text, truncation=True, max_length=512)["input_ids"])
+
+    def _pad(self, token_ids: List[Tuple[int, ...]]) -> Dict[str, "torch.Tensor"]:
+        """トークンID列を右詰めでパディングしてバッチ入力を作成"""
+        sequences = [self.torch.tensor(ids, dtype=self.torch.long) for ids in token_ids]
+        input_ids = self.torch.nn.utils.rnn.pad_sequence(
+            sequences, batch_first=True, padding_value=self.tokenizer.pad_token_id
+        )
+        lengths = self.torch.tensor([len(ids) for ids in token_ids])
+        attention_mask = (self.torch.arange(input_ids.shape[1])[None, :] < lengths[:, None]).long()
+        return {'input_ids': input_ids, 'attention_mask': attention_mask}
 
     def aggregate_sentiment(
         self,
-        texts: List[str],
-        weights: List[float] = None
+        texts: List[str] = None,
+        weights: List[float] = None,
+        results: SentimentBatch = None
     ) -> Dict[str, float]:
         """
         複数テキストのセンチメントを集約
@@ -150,11 +233,15 @@ class SentimentAnalyzer:
         Args:
             texts: テキストのリスト
             weights: 各テキストの重み (オプション)
+            results: analyze_batch の結果 (指定時はtextsを分析せずこれを集約)
 
         Returns:
             集約されたセンチメント
         """
-        if not texts:
+        if results is None:
+            results = self.analyze_batch(texts or [])
+
+        if len(results) == 0:
             return {
                 'avg_sentiment': 0.0,
                 'positive_ratio': 0.0,
@@ -163,25 +250,17 @@ class SentimentAnalyzer:
                 'count': 0
             }
 
-        results = self.analyze_batch(texts)
+        total = len(results)
 
         if weights is None:
-            weights = [1.0] * len(results)
-
-        total_weight = sum(weights)
+            weights = np.ones(total)
+        weights = np.asarray(weights, dtype=np.float64)
 
         # 重み付き平均
-        avg_sentiment = sum(
-            r['sentiment_score'] * w
-            for r, w in zip(results, weights)
-        ) / total_weight
+        avg_sentiment = float(results.sentiment_score @ weights) / float(weights.sum())
 
         # ラベルごとの割合
-        positive_count = sum(1 for r in results if r['label'] == 'positive')
-        negative_count = sum(1 for r in results if r['label'] == 'negative')
-        neutral_count = sum(1 for r in results if r['label'] == 'neutral')
-
-        total = len(results)
+        positive_count, neutral_count, negative_count = (int(c) for c in np.bincount(results.label, minlength=3))
 
         return {
             'avg_sentiment': avg_sentiment,
@@ -194,15 +273,17 @@ class SentimentAnalyzer:
             'neutral_count': neutral_count
         }
 
-    def analyze_news_articles(self, articles: List[Dict]) -> Dict:
+    def analyze_news_articles(self, articles: List[Dict], out_path: Optional[Union[str, Path]] = None) -> Dict:
         """
         ニュース記事のセンチメント分析
 
         Args:
             articles: NewsCollector から取得した記事リスト
+            out_path: 指定時は記事ごとの結果をParquetに書き出し、individualの辞書リストは作らない
+                （列: published_at, source, positive, neutral, negative, sentiment_score, label）
 
         Returns:
-            分析結果
+            分析結果（out_path指定時は individual の代わりに individual_path）
         """
         texts = []
         weights = []
@@ -220,13 +301,42 @@ class SentimentAnalyzer:
 
             weights.append(weight)
 
-        aggregated = self.aggregate_sentiment(texts, weights)
-
-        # 個別の分析結果も保存
+        # 個別の分析結果を一度だけ計算し、集約にも使い回す
         individual_results = self.analyze_batch(texts)
+        aggregated = self.aggregate_sentiment(weights=weights, results=individual_results)
+
+        if out_path is not None:
+            out_path = self._write_results(articles, individual_results, out_path)
+            logger.info(f"💾 記事別センチメント保存: {out_path}")
+            return {
+                'aggregated': aggregated,
+                'individual_path': out_path,
+                'total_articles': len(articles)
+            }
 
         return {
             'aggregated': aggregated,
-            'individual': individual_results,
+            'individual': individual_results.as_dicts(),
             'total_articles': len(articles)
         }
+
+    @staticmethod
+    def _write_results(articles: List[Dict], results: SentimentBatch, out_path: Union[str, Path]) -> Path:
+        """記事別の結果配列をそのまま列にしてParquet（Snappy圧縮）に書き出す"""
+        out_path = Path(out_path)
+        published_at = pd.to_datetime(
+            [article.get('published_at') or None for article in articles],
+            utc=True, format='ISO8601', errors='coerce'
+        )
+        table = pa.table({
+            'published_at': pa.array(published_at),
+            'source': pa.array([article.get('source') for article in articles], type=pa.string()),
+            'positive': results.positive,
+            'neutral': results.neutral,
+            'negative': results.negative,
+            'sentiment_score': results.sentiment_score,
+            # ラベルはLABELSのインデックスをそのまま辞書エンコードの参照先にする
+            'label': pa.DictionaryArray.from_arrays(results.label, pa.array(LABELS)),
+        })
+        pq.write_table(table, out_path, compression='snappy')
+        return out_path
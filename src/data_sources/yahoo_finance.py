@@ -8,10 +8,20 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from loguru import logger
-from typing import Optional
+from typing import Dict, List, Optional
 import warnings
+
+from ..tools import YAHOO_BUCKET, FileCache
+from ._symbols import pair_to_ticker
 warnings.filterwarnings('ignore')
 
+# 取得期間の終了日がこれより前なら確定済み（再取得不要）とみなす
+FINALIZED_AFTER = timedelta(days=7)
+# 直近を含む期間のキャッシュ有効期限（秒）
+RECENT_TTL = 24 * 3600
+# 整形後の列
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
 
 class YahooFinanceData:
     """
@@ -28,6 +38,7 @@ class YahooFinanceData:
         try:
             import yfinance as yf
             self.yf = yf
+            self._cache = FileCache("yfinance")
             logger.info("Yahoo Finance データソース初期化成功")
         except ImportError:
             logger.error("yfinance未インストール: pip install yfinance")
@@ -53,7 +64,7 @@ class YahooFinanceData:
             DataFrame (open, high, low, close, volume)
         """
         # Yahoo Financeのティッカー形式に変換
-        ticker = self._pair_to_ticker(pair)
+        ticker = pair_to_ticker(pair)
 
         if end_date is None:
             end_date = datetime.now().strftime('%Y-%m-%d')
@@ -62,35 +73,133 @@ class YahooFinanceData:
 
         try:
             # データ取得
+            data = self._download(ticker, start_date, end_date, interval)
+
+            if data.empty:
+                logger.warning(f"{ticker} データが空です")
+                return pd.DataFrame()
+
+            logger.info(f"{pair} データ取得完了: {len(data)}件")
+
+            return data
+
+        except Exception as e:
+            logger.error(f"{pair} データ取得エラー: {e}")
+            return pd.DataFrame()
+
+    def _download(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: Optional[str],
+        interval: str
+    ) -> pd.DataFrame:
+        """
+        1ティッカー分の整形済みDataFrameを取得（_download_manyを参照）
+
+        Returns:
+            整形済みDataFrame（取得できなかった場合は空のDataFrame）
+        """
+        return self._download_many([ticker], start_date, end_date, interval)[ticker]
+
+    def _download_many(
+        self,
+        tickers: List[str],
+        start_date: str,
+        end_date: Optional[str],
+        interval: str
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        yf.downloadの結果をティッカーごとに (open, high, low, close, volume) に整形して返す
+
+        (ティッカー, 期間, 時間足) をキーにディスクへキャッシュし、
+        終了日が確定済みの期間は再ダウンロードしない（直近を含む期間は1日で更新）。
+        キャッシュにないティッカーは1回のyf.download（内部でスレッド並列）でまとめて取得する
+
+        Returns:
+            {ティッカー: 整形済みDataFrame}（取得できなかったティッカーは空のDataFrame）
+        """
+        finalized = end_date is not None and self._naive_timestamp(end_date) < datetime.now() - FINALIZED_AFTER
+        ttl = None if finalized else RECENT_TTL
+
+        def cache_params(ticker: str) -> dict:
+            return {"ticker": ticker, "start": start_date, "end": end_date, "interval": interval}
+
+        result = {}
+        missing = []
+        for ticker in tickers:
+            cached = self._cache.get_frame("yfinance/download", cache_params(ticker), ttl=ttl)
+            if cached is not None:
+                logger.debug(f"{ticker} キャッシュを使用")
+                result[ticker] = cached
+            else:
+                missing.append(ticker)
+
+        if not missing:
+            return result
+
+        try:
+            YAHOO_BUCKET.acquire()
             data = self.yf.download(
-                ticker,
+                missing,
                 start=start_date,
                 end=end_date,
                 interval=interval,
+                group_by='ticker',
+                multi_level_index=False,
+                threads=True,
                 progress=False
             )
+        except Exception as e:
+            # 取得済み（キャッシュ）のティッカーは返し、取得できなかった分だけ空にする
+            logger.error(f"{', '.join(missing)} 取得エラー: {e}")
+            result.update({ticker: pd.DataFrame() for ticker in missing})
+            return result
+
+        for ticker in missing:
+            # 1ティッカーのみの場合はmulti_level_index=Falseで単一階層の列になる
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    result[ticker] = pd.DataFrame()
+                    continue
+                # 複数ティッカーの行は全ティッカーの日付の和集合なので、そのティッカーの取引日だけに絞る
+                frame = data[ticker].dropna(how='all')
+            else:
+                frame = data
 
-            if data.empty:
-                logger.warning(f"{ticker} データが空です")
-                return pd.DataFrame()
+            if frame.empty:
+                result[ticker] = pd.DataFrame()
+                continue
 
-            # カラム名を小文字に統一（tupleの場合は最初の要素を取得）
-            if isinstance(data.columns[0], tuple):
-                data.columns = [col[0].lower() if isinstance(col, tuple) else col.lower() for col in data.columns]
-            else:
-                data.columns = [col.lower() for col in data.columns]
+            # 1ティッカーの整形・保存に失敗しても他のティッカーは返す
+            try:
+                frame = self._normalize(frame)
+                self._cache.set_frame("yfinance/download", cache_params(ticker), frame)
+            except Exception as e:
+                logger.error(f"{ticker} 取得エラー: {e}")
+                frame = pd.DataFrame()
+            result[ticker] = frame
 
-            # volumeがない場合は0で埋める
-            if 'volume' not in data.columns:
-                data['volume'] = 0
+        return result
 
-            logger.info(f"{pair} データ取得完了: {len(data)}件")
+    @staticmethod
+    def _naive_timestamp(value) -> pd.Timestamp:
+        """yf.downloadが受け付ける日付（文字列・datetime）をタイムゾーンなしのTimestampに変換"""
+        timestamp = pd.Timestamp(value)
+        return timestamp.tz_convert(None) if timestamp.tzinfo is not None else timestamp
 
-            return data[['open', 'high', 'low', 'close', 'volume']]
+    @staticmethod
+    def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+        """yf.downloadの1ティッカー分を (open, high, low, close, volume) に整形"""
+        # カラム名を小文字に統一
+        data = data.set_axis(data.columns.str.lower(), axis=1)
 
-        except Exception as e:
-            logger.error(f"{pair} データ取得エラー: {e}")
-            return pd.DataFrame()
+        # volumeがない場合は0で埋める
+        if 'volume' not in data.columns:
+            data['volume'] = 0
+
+        # 列の並べ替えで全列を1つのブロックにコピーし直さないよう、各列をそのまま使って組み立てる
+        return pd.DataFrame({col: data[col] for col in OHLCV_COLUMNS}, copy=False)
 
     def get_multiple_pairs(
         self,
@@ -116,33 +225,9 @@ class YahooFinanceData:
             if not data.empty:
                 result[pair] = data
 
-            # レート制限回避
-            import time
-            time.sleep(0.5)
-
         logger.info(f"複数通貨ペア取得完了: {len(result)}ペア")
         return result
 
-    def _pair_to_ticker(self, pair: str) -> str:
-        """
-        通貨ペアをYahoo Financeティッカーに変換
-
-        Args:
-            pair: USD/JPY形式
-
-        Returns:
-            Yahoo Financeティッカー (例: JPY=X)
-        """
-        # USD/JPY -> JPYUSD=X (Yahoo形式)
-        # スラッシュを削除して=Xを追加
-        pair_clean = pair.replace('/', '').replace('_', '')
-
-        # Yahoo Financeでは逆順+Xの場合が多い
-        # USD/JPY -> JPY=X ではなく USDJPY=X
-        ticker = f"{pair_clean}=X"
-
-        return ticker
-
     def get_stock_indices(
         self,
         start_date: str = "2020-01-01",
@@ -164,33 +249,18 @@ class YahooFinanceData:
 
         result = {}
 
-        for name, ticker in indices.items():
-            try:
-                data = self.yf.download(
-                    ticker,
-                    start=start_date,
-                    end=end_date,
-                    interval='1d',
-                    progress=False
-                )
-
-                if not data.empty:
-                    # カラム名を小文字に統一（tupleの場合は最初の要素を取得）
-                    if isinstance(data.columns[0], tuple):
-                        data.columns = [col[0].lower() if isinstance(col, tuple) else col.lower() for col in data.columns]
-                    else:
-                        data.columns = [col.lower() for col in data.columns]
-
-                    if 'volume' not in data.columns:
-                        data['volume'] = 0
-                    result[name] = data[['open', 'high', 'low', 'close', 'volume']]
-                    logger.info(f"{name} ({ticker}) 取得: {len(data)}件")
-
-            except Exception as e:
-                logger.error(f"{name} 取得エラー: {e}")
+        # 全指数を1回のリクエストでまとめて取得（失敗したティッカーは空で返る）
+        try:
+            downloaded = self._download_many(list(indices.values()), start_date, end_date, '1d')
+        except Exception as e:
+            logger.error(f"株価指数 取得エラー: {e}")
+            return result
 
-            import time
-            time.sleep(0.5)
+        for name, ticker in indices.items():
+            data = downloaded[ticker]
+            if not data.empty:
+                result[name] = data
+                logger.info(f"{name} ({ticker}) 取得: {len(data)}件")
 
         return result
 
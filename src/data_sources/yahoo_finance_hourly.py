@@ -7,7 +7,10 @@ from datetime import datetime, timedelta
 from loguru import logger
 import pandas as pd
 import yfinance as yf
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from ..tools import YAHOO_BUCKET, downcast_prices, load_frame, save_frame
+from ._symbols import pair_to_symbol, pair_to_ticker
 
 
 class YahooFinanceHourly:
@@ -31,13 +34,14 @@ class YahooFinanceHourly:
         self,
         pair: str = 'USDJPY=X',
         period: str = '2y',  # 2年分
-        save: bool = True
+        save: bool = True,
+        save_format: str = 'feather'
     ) -> pd.DataFrame:
         """
         Yahoo Financeから時間足データを取得
 
         Args:
-            pair: 通貨ペア（Yahoo Finance形式）
+            pair: 通貨ペア（Yahoo Finance形式、USD/JPY形式も可）
                 - USDJPY=X: USD/JPY
                 - EURUSD=X: EUR/USD
                 - GBPUSD=X: GBP/USD
@@ -48,7 +52,10 @@ class YahooFinanceHourly:
                 - '1y': 1年
                 - '2y': 2年
                 - 'max': 最大
-            save: CSVに保存するか
+            save: 保存するか
+            save_format: 保存形式
+                - feather: 後続処理ですぐ読み込む受け渡し用（読み込みが速い）
+                - parquet: 長期保存用
 
         Returns:
             時間足データのDataFrame
@@ -56,34 +63,8 @@ class YahooFinanceHourly:
         logger.info(f"{pair} {self.interval}データ取得開始: {period}")
 
         try:
-            # Yahoo Financeからデータ取得
-            ticker = yf.Ticker(pair)
-            df = ticker.history(
-                period=period,
-                interval=self.interval
-            )
-
-            if df.empty:
-                raise ValueError(f"データを取得できませんでした: {pair}")
-
-            # カラム名を標準化（小文字）
-            df.columns = df.columns.str.lower()
-
-            # 不要な列を削除（dividends, stock splitsはFXには不要）
-            df = df[['open', 'high', 'low', 'close', 'volume']]
-
-            logger.info(f"✅ 取得完了: {len(df)}本のローソク足")
-            logger.info(f"期間: {df.index.min()} ~ {df.index.max()}")
-            logger.info(f"データ完全性: {(1 - df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100:.1f}%")
-
-            # 保存
-            if save:
-                filename = f"{pair.replace('=X', '')}_{self.interval}_{period}.csv"
-                filepath = self.data_dir / filename
-                df.to_csv(filepath)
-                logger.info(f"💾 保存: {filepath}")
-
-            return df
+            df = self._download([pair], period)[pair]
+            return self._finalize(pair, df, period, save, save_format)
 
         except Exception as e:
             logger.error(f"データ取得エラー: {e}")
@@ -106,35 +87,120 @@ class YahooFinanceHourly:
         """
         logger.info(f"複数通貨ペアデータ取得開始: {len(pairs)}ペア")
 
+        # 全ペアを1回のyf.download（内部でスレッド並列）で取得する
+        # （yf.downloadはモジュール共有の状態に結果を書き込むため、複数スレッドから同時に呼ばない）
+        try:
+            frames = self._download(pairs, period)
+        except Exception as e:
+            logger.error(f"データ取得エラー: {e}")
+            frames = {}
+
+        # 結果は指定した通貨ペアの順（_downloadの返り値の順）
         results = {}
-        for pair in pairs:
+        for pair, df in frames.items():
             try:
-                logger.info(f"\n{'='*60}")
-                logger.info(f"通貨ペア: {pair}")
-                logger.info(f"{'='*60}")
-
-                df = self.get_hourly_data(
-                    pair=pair,
-                    period=period,
-                    save=True
-                )
-                results[pair] = df
-
+                results[pair] = self._finalize(pair, df, period, save=True, save_format='feather')
             except Exception as e:
                 logger.error(f"{pair} のデータ取得に失敗: {e}")
-                continue
 
         logger.info(f"\n✅ 複数通貨ペアデータ取得完了: {len(results)}/{len(pairs)}ペア")
         return results
 
-    def load_saved_data(self, pair: str, period: str = '2y') -> Optional[pd.DataFrame]:
-        """保存済みデータを読み込み"""
-        filename = f"{pair.replace('=X', '')}_{self.interval}_{period}.csv"
+    def _download(self, pairs: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        """
+        通貨ペアの時間足を1回のyf.downloadで取得
+
+        Returns:
+            {通貨ペア: 取得したままのDataFrame}（取得できなかったペアは空のDataFrame）
+        """
+        tickers = [pair_to_ticker(pair) for pair in pairs]
+        YAHOO_BUCKET.acquire()  # API制限（ホスト単位のトークンバケット）
+        # Tickerオブジェクトを作らず、1ティッカーなら単一階層の列で取得
+        data = yf.download(
+            tickers,
+            period=period,
+            interval=self.interval,
+            group_by='ticker',
+            auto_adjust=False,
+            multi_level_index=False,
+            threads=True,
+            progress=False
+        )
+
+        frames = {}
+        for pair, ticker in zip(pairs, tickers):
+            if not isinstance(data.columns, pd.MultiIndex):
+                frames[pair] = data
+            elif ticker in data.columns.get_level_values(0):
+                # 複数ティッカーの行は全ティッカーの時刻の和集合なので、そのティッカーの行だけに絞る
+                frames[pair] = data[ticker].dropna(how='all')
+            else:
+                frames[pair] = pd.DataFrame()
+        return frames
+
+    def _finalize(
+        self,
+        pair: str,
+        df: pd.DataFrame,
+        period: str,
+        save: bool,
+        save_format: str
+    ) -> pd.DataFrame:
+        """取得したDataFrameを (open, high, low, close, volume) に整形して保存"""
+        if df.empty:
+            raise ValueError(f"データを取得できませんでした: {pair}")
+
+        # カラム名を標準化（小文字）
+        df = df.set_axis(df.columns.str.lower(), axis=1)
+
+        # 不要な列を削除（adj closeはFXには不要）
+        df = df[['open', 'high', 'low', 'close', 'volume']]
+
+        logger.info(f"✅ {pair} 取得完了: {len(df)}本のローソク足")
+        logger.info(f"期間: {df.index.min()} ~ {df.index.max()}")
+        missing = int(df.isna().to_numpy().sum())
+        completeness = (1 - missing / df.size) * 100
+        logger.info(f"データ完全性: {completeness:.1f}%")
+
+        # 価格列はfloat32で保持・保存
+        df = downcast_prices(df)
+
+        # 保存
+        if save:
+            filename = f"{pair_to_symbol(pair)}_{self.interval}_{period}"
+            filepath = save_frame(df, self.data_dir / filename, save_format)
+            logger.info(f"💾 保存: {filepath}")
+
+        return df
+
+    def load_saved_data(
+        self,
+        pair: str,
+        period: str = '2y',
+        mmap: bool = True,
+        columns: Optional[List[str]] = None,
+        date_range: Optional[Tuple[str, str]] = None,
+        file_format: str = 'auto'
+    ) -> Optional[pd.DataFrame]:
+        """
+        保存済みデータを読み込み
+
+        Args:
+            mmap: メモリマップで開くか
+            columns: 読み込む列（例: ['close']、Noneなら全列）
+            date_range: (開始, 終了) 読み込む期間（両端を含む）
+            file_format: auto（Feather・Parquetのうち新しい方）・feather・parquet
+        """
+        filename = f"{pair_to_symbol(pair)}_{self.interval}_{period}"
         filepath = self.data_dir / filename
 
-        if filepath.exists():
+        # DatetimeIndexはParquet・Featherからそのまま復元される（旧形式のCSVのみ日時を解析）
+        df = load_frame(
+            filepath, memory_map=mmap, columns=columns, date_range=date_range,
+            file_format=file_format
+        )
+        if df is not None:
             logger.info(f"保存済みデータ読み込み: {filepath}")
-            df = pd.read_csv(filepath, index_col=0, parse_dates=True)
             logger.info(f"✅ 読み込み完了: {len(df)}本")
             return df
         else:
@@ -175,7 +241,9 @@ def collect_all_hourly_data():
         logger.info(f"\n{pair}:")
         logger.info(f"  ローソク足数: {len(df):,}")
         logger.info(f"  期間: {df.index.min()} ~ {df.index.max()}")
-        logger.info(f"  完全性: {(1 - df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100:.1f}%")
+        missing = int(df.isna().to_numpy().sum())
+        completeness = (1 - missing / df.size) * 100
+        logger.info(f"  完全性: {completeness:.1f}%")
         logger.info(f"  データ範囲:")
         logger.info(f"    始値: {df['open'].min():.3f} ~ {df['open'].max():.3f}")
         logger.info(f"    終値: {df['close'].min():.3f} ~ {df['close'].max():.3f}")
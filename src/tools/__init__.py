@@ -0,0 +1,28 @@
+"""
+共通ユーティリティモジュール
+
+JITカーネル（kernels）はnumbaの読み込みに時間がかかるため、最初に参照された時点でインポートする
+（キャッシュ・保存・レート制御だけを使うデータ収集では読み込まない）
+"""
+import importlib
+
+from .cache import FileCache, cached_features
+from .indicators import wilder_mean
+from .rate_limit import OANDA_BUCKET, YAHOO_BUCKET, RateLimiter, TokenBucket
+from .storage import downcast_prices, load_frame, save_frame
+
+__all__ = [
+    "FileCache", "OANDA_BUCKET", "RateLimiter", "TokenBucket", "YAHOO_BUCKET", "cached_features",
+    "downcast_prices", "ewm_mean", "ewm_time_mean", "load_frame", "on_balance_volume", "rolling_mad",
+    "rolling_mean_std", "rolling_skew_kurt", "save_frame", "wilder_mean",
+]
+
+_KERNELS = {
+    "ewm_mean", "ewm_time_mean", "on_balance_volume", "rolling_mad", "rolling_mean_std", "rolling_skew_kurt",
+}
+
+
+def __getattr__(name: str):
+    if name in _KERNELS:
+        return getattr(importlib.import_module(".kernels", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,211 @@
+"""
+APIレスポンスのファイルキャッシュ
+
+開発中の再実行で同じ期間のデータを再ダウンロードしないよう、
+レスポンスをgzip圧縮JSON（DataFrameはParquet）としてディスクに保存する
+（入力に対して決定的な特徴量生成の結果も、入力データのハッシュをキーに保存する）
+"""
+import gzip
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from loguru import logger
+
+# 特徴量キャッシュのバージョン（ソースに現れない変更で結果が変わる場合に上げる）
+FEATURES_VERSION = 1
+# 有無によって特徴量の計算経路が変わる任意の依存パッケージ
+OPTIONAL_BACKENDS = ("bottleneck", "numba", "numexpr", "talib")
+
+
+class FileCache:
+    """
+    (URL, パラメータ) をキーとするAPIレスポンスキャッシュ
+
+    保存先: <cache_dir>/<provider>/<sha1(url+params)>.json.gz
+            （DataFrameは <sha1(url+params)>.parquet）
+    """
+
+    def __init__(self, provider: str, cache_dir: Path = Path(".cache")):
+        """
+        Args:
+            provider: キャッシュの名前空間（oanda, fred等）
+            cache_dir: キャッシュのルートディレクトリ
+        """
+        self.provider = provider
+        self.cache_dir = Path(cache_dir) / provider
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _key_path(self, url: str, params: dict, suffix: str = ".json.gz") -> Path:
+        """キャッシュファイルのパスを生成"""
+        key = url + json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}{suffix}"
+
+    def _tmp_path(self, path: Path) -> Path:
+        """書き込み途中のファイル名（プロセス・スレッドごとに一意）"""
+        return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def get(self, url: str, params: dict, ttl: Optional[float] = None) -> Optional[Any]:
+        """
+        キャッシュ済みレスポンスを取得
+
+        Args:
+            url: エンドポイント
+            params: リクエストパラメータ
+            ttl: 有効期限（秒）。Noneなら無期限
+
+        Returns:
+            キャッシュされたデータ（未保存・期限切れの場合はNone）
+        """
+        path = self._key_path(url, params)
+        if not path.exists():
+            return None
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"キャッシュ読み込みエラー ({self.provider}): {e}")
+            return None
+
+        if ttl is not None and time.time() - entry["timestamp"] > ttl:
+            return None
+
+        return entry["data"]
+
+    def set(self, url: str, params: dict, data: Any):
+        """
+        レスポンスをキャッシュに保存
+
+        Args:
+            url: エンドポイント
+            params: リクエストパラメータ
+            data: JSONシリアライズ可能なレスポンス
+        """
+        path = self._key_path(url, params)
+        tmp_path = self._tmp_path(path)
+
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"timestamp": time.time(), "data": data}, f)
+
+        # 並列書き込みでも壊れたファイルを残さない
+        os.replace(tmp_path, path)
+
+    def get_frame(self, url: str, params: dict, ttl: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """
+        キャッシュ済みDataFrameを取得（有効期限はファイルの更新時刻で判定）
+
+        Args:
+            url: エンドポイント（またはデータ取得処理の識別子）
+            params: リクエストパラメータ
+            ttl: 有効期限（秒）。Noneなら無期限
+
+        Returns:
+            キャッシュされたDataFrame（未保存・期限切れの場合はNone）
+        """
+        path = self._key_path(url, params, ".parquet")
+        if not path.exists():
+            return None
+
+        if ttl is not None and time.time() - path.stat().st_mtime > ttl:
+            return None
+
+        try:
+            # 列ごとに別ブロックで変換し（数値列はArrowのバッファをそのまま使える）、
+            # 変換済みの列からArrow側のメモリを解放する
+            return pq.read_table(path).to_pandas(split_blocks=True, self_destruct=True, use_threads=True)
+        except (OSError, ValueError) as e:
+            logger.warning(f"キャッシュ読み込みエラー ({self.provider}): {e}")
+            return None
+
+    def set_frame(self, url: str, params: dict, frame: pd.DataFrame):
+        """
+        DataFrameをParquetでキャッシュに保存
+
+        Args:
+            url: エンドポイント（またはデータ取得処理の識別子）
+            params: リクエストパラメータ
+            frame: 保存するDataFrame
+        """
+        path = self._key_path(url, params, ".parquet")
+        tmp_path = self._tmp_path(path)
+
+        frame.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+        os.replace(tmp_path, path)
+
+
+def _frame_digest(frame: pd.DataFrame) -> str:
+    """DataFrameの内容（インデックス・列名・値）のハッシュ"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(frame.index.to_numpy().tobytes())
+    for col in frame.columns:
+        digest.update(str(col).encode("utf-8"))
+        digest.update(frame[col].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def cached_features(
+    func: Callable[[pd.DataFrame], pd.DataFrame],
+    frame: pd.DataFrame,
+    depends_on: Sequence[Callable] = ()
+) -> pd.DataFrame:
+    """
+    特徴量生成関数の結果を入力データのハッシュでキャッシュ
+
+    生成処理は入力に対して決定的なので、同じ入力なら再計算せずParquetを読み込む
+    キーには入力のほか、生成関数と依存する補助関数のソース・FEATURES_VERSION・
+    利用できる任意の計算バックエンドを含め、いずれかが変わった場合は再計算される
+
+    Args:
+        func: DataFrameを受け取り特徴量のDataFrameを返す関数
+        frame: 入力データ
+        depends_on: funcが呼び出す補助関数（ソースをキーに含める）
+
+    Returns:
+        特徴量のDataFrame
+    """
+    cache = FileCache("features")
+    source = hashlib.sha1()
+    for dependency in (func, *depends_on):
+        source.update(_source_of(dependency).encode("utf-8"))
+    params = {
+        "version": FEATURES_VERSION,
+        "source": source.hexdigest(),
+        "backends": _available_backends(),
+        "input": _frame_digest(frame),
+    }
+    features = cache.get_frame(f"features/{func.__name__}", params)
+
+    if features is None:
+        features = func(frame)
+        cache.set_frame(f"features/{func.__name__}", params, features)
+    else:
+        logger.info(f"  {func.__name__}: キャッシュを使用")
+
+    return features
+
+
+def _source_of(func: Callable) -> str:
+    """キャッシュキー用の関数のソース"""
+    module = inspect.getmodule(func)
+    # src.toolsの関数は同じモジュールの非公開カーネルを呼ぶため、モジュール全体のソースを使う
+    if module is not None and module.__name__.startswith(f"{__package__}."):
+        return inspect.getsource(module)
+    return inspect.getsource(func)
+
+
+@lru_cache(maxsize=None)
+def _available_backends() -> dict:
+    """特徴量の計算経路を切り替える任意の依存パッケージの有無"""
+    return {name: importlib.util.find_spec(name) is not None for name in OPTIONAL_BACKENDS}
@@ -0,0 +1,25 @@
+"""
+テクニカル指標の共通計算
+"""
+import numpy as np
+import pandas as pd
+
+
+def wilder_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder平滑化（TA-Lib互換: 最初のperiod本の単純平均で初期化）
+
+    先頭の無効値（NaN）は出力でもNaNのまま
+    """
+    result = np.full(values.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) < period:
+        return result
+
+    first = valid[0]
+    start = first + period - 1
+
+    seeded = values[start:].copy()
+    seeded[0] = values[first:start + 1].mean()
+    result[start:] = pd.Series(seeded).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    return result
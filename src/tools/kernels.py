@@ -0,0 +1,376 @@
+"""
+ローリング統計量・指数移動平均のJITカーネル
+
+numbaがあれば各ウィンドウを1パス（O(N)）のコンパイル済みループで計算し、
+複数のウィンドウ幅を並列に処理する。numbaがない環境ではpandas・NumPyで同じ結果を返す
+
+いずれの関数も (len(windows), len(values)) の配列を返し、
+ローリング系はウィンドウ内に欠損を含む位置がpandasのrolling(window)と同じくNaNになる
+
+コンパイル結果はcache=Trueで__pycache__に保存し、2回目以降の実行ではJITコンパイルを行わない。
+直列カーネルは引数の型を明示してインポート時に（キャッシュから）読み込む。
+並列カーネルはインポート時にコンパイルするとその時点でスレッドプールが起動し、
+後からワーカープロセスをforkするスクリプト（TBBはfork非対応）が終了時に停止するため、初回呼び出し時に読み込む。
+欠損判定が消えるためfastmathは使わない
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from numba import njit, prange, types
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    # 直列カーネルの入力は読み取り専用の連続配列として型付けする
+    # （書き込み可能な配列も、pandasのCopy-on-Writeで読み取り専用になったビューもコピーせずに渡せる）
+    _f8 = types.Array(types.float64, 1, "C", readonly=True)
+    _i8 = types.Array(types.int64, 1, "C", readonly=True)
+
+    @njit(parallel=True, cache=True)
+    def _rolling_mean_std_nb(values, windows):
+        n = len(values)
+        means = np.full((len(windows), n), np.nan)
+        stds = np.full((len(windows), n), np.nan)
+        for j in prange(len(windows)):
+            window = windows[j]
+            # Welford法（追加・削除）で平均と偏差平方和を更新
+            count = 0
+            nan_count = 0
+            mean = 0.0
+            m2 = 0.0
+            for i in range(n):
+                x = values[i]
+                if np.isnan(x):
+                    nan_count += 1
+                else:
+                    count += 1
+                    delta = x - mean
+                    mean += delta / count
+                    m2 += delta * (x - mean)
+                if i >= window:
+                    y = values[i - window]
+                    if np.isnan(y):
+                        nan_count -= 1
+                    else:
+                        count -= 1
+                        if count == 0:
+                            mean = 0.0
+                            m2 = 0.0
+                        else:
+                            delta = y - mean
+                            mean -= delta / count
+                            m2 -= delta * (y - mean)
+                if i >= window - 1 and nan_count == 0:
+                    means[j, i] = mean
+                    if window > 1:
+                        stds[j, i] = np.sqrt(max(m2, 0.0) / (window - 1))
+        return means, stds
+
+    @njit(parallel=True, cache=True)
+    def _rolling_skew_kurt_nb(values, windows):
+        n = len(values)
+        skews = np.full((len(windows), n), np.nan)
+        kurts = np.full((len(windows), n), np.nan)
+        for j in prange(len(windows)):
+            window = windows[j]
+            nobs = float(window)
+            # 平均と2〜4次の中心モーメント和をPébayの更新式（追加・削除）で直接更新する
+            # （生のべき乗和から中心モーメントを求めると、水準の大きい系列で桁落ちする）
+            count = 0
+            nan_count = 0
+            mean = 0.0
+            m2 = 0.0
+            m3 = 0.0
+            m4 = 0.0
+            for i in range(n):
+                x = values[i]
+                if np.isnan(x):
+                    nan_count += 1
+                else:
+                    prev = count
+                    count += 1
+                    delta = x - mean
+                    delta_n = delta / count
+                    delta_n2 = delta_n * delta_n
+                    term = delta * delta_n * prev
+                    mean += delta_n
+                    m4 += term * delta_n2 * (count * count - 3 * count + 3) + 6 * delta_n2 * m2 - 4 * delta_n * m3
+                    m3 += term * delta_n * (count - 2) - 3 * delta_n * m2
+                    m2 += term
+                if i >= window:
+                    y = values[i - window]
+                    if np.isnan(y):
+                        nan_count -= 1
+                    elif count == 1:
+                        count = 0
+                        mean = 0.0
+                        m2 = 0.0
+                        m3 = 0.0
+                        m4 = 0.0
+                    else:
+                        # 追加の更新式を逆にたどる（削除後の平均・モーメントを順に求める）
+                        mean = (count * mean - y) / (count - 1)
+                        delta = y - mean
+                        delta_n = delta / count
+                        delta_n2 = delta_n * delta_n
+                        term = delta * delta_n * (count - 1)
+                        m2 -= term
+                        m3 -= term * delta_n * (count - 2) - 3 * delta_n * m2
+                        m4 -= term * delta_n2 * (count * count - 3 * count + 3) + 6 * delta_n2 * m2 - 4 * delta_n * m3
+                        count -= 1
+                if i % window == window - 1 and count > 0:
+                    # 削除の更新で丸め誤差が蓄積しないよう、windowステップごとに現在のウィンドウから再計算
+                    # （償却O(1)で全体はO(N)のまま）
+                    total = 0.0
+                    for k in range(i - window + 1, i + 1):
+                        if not np.isnan(values[k]):
+                            total += values[k]
+                    mean = total / count
+                    m2 = 0.0
+                    m3 = 0.0
+                    m4 = 0.0
+                    for k in range(i - window + 1, i + 1):
+                        if not np.isnan(values[k]):
+                            d = values[k] - mean
+                            d2 = d * d
+                            m2 += d2
+                            m3 += d2 * d
+                            m4 += d2 * d2
+                if i < window - 1 or nan_count > 0:
+                    continue
+
+                b = m2 / nobs
+                if b <= 1e-14:
+                    continue
+                c = m3 / nobs
+                d = m4 / nobs
+                if window >= 3:
+                    skews[j, i] = np.sqrt(nobs * (nobs - 1)) * c / ((nobs - 2) * b ** 1.5)
+                if window >= 4:
+                    k = (nobs * nobs - 1) * d / (b * b) - 3 * (nobs - 1) ** 2
+                    kurts[j, i] = k / ((nobs - 2) * (nobs - 3))
+        return skews, kurts
+
+    @njit(parallel=True, cache=True)
+    def _rolling_mad_nb(values, windows):
+        n = len(values)
+        result = np.full((len(windows), n), np.nan)
+        for j in range(len(windows)):
+            window = windows[j]
+            for i in prange(window - 1, n):
+                total = 0.0
+                for k in range(i - window + 1, i + 1):
+                    total += values[k]
+                mean = total / window
+                deviation = 0.0
+                for k in range(i - window + 1, i + 1):
+                    deviation += abs(values[k] - mean)
+                result[j, i] = deviation / window
+        return result
+
+    @njit((_f8, _f8), cache=True)
+    def _ewm_mean_nb(values, spans):
+        n = len(values)
+        k = len(spans)
+        result = np.full((k, n), np.nan)
+        if n == 0:
+            return result
+        # pandasのewm(span).mean()（adjust=True, ignore_na=False）と同じ漸化式を
+        # 入力を一度だけ走査しながら全スパン分まとめて更新する
+        decay = 1.0 - 2.0 / (spans + 1.0)
+        weighted = np.full(k, values[0])
+        old_weight = np.ones(k)
+        observed = not np.isnan(values[0])
+        if observed:
+            result[:, 0] = weighted
+        for i in range(1, n):
+            x = values[i]
+            is_observation = not np.isnan(x)
+            observed = observed or is_observation
+            for j in range(k):
+                if not np.isnan(weighted[j]):
+                    old_weight[j] *= decay[j]
+                    if is_observation:
+                        if weighted[j] != x:
+                            weighted[j] = (old_weight[j] * weighted[j] + x) / (old_weight[j] + 1.0)
+                        old_weight[j] += 1.0
+                elif is_observation:
+                    weighted[j] = x
+                if observed:
+                    result[j, i] = weighted[j]
+        return result
+
+    @njit((_f8, _f8), cache=True)
+    def _on_balance_volume_nb(close, volume):
+        n = len(close)
+        result = np.empty(n)
+        if n == 0:
+            return result
+        # 前日比の符号で出来高を加減算する累積和を1パスで計算
+        # （前日比・出来高が欠損の行は加算しない）
+        total = 0.0
+        result[0] = 0.0
+        for i in range(1, n):
+            change = close[i] - close[i - 1]
+            v = volume[i]
+            if not np.isnan(v):
+                if change > 0:
+                    total += v
+                elif change < 0:
+                    total -= v
+            result[i] = total
+        return result
+
+    @njit((_f8, _i8, types.float64), cache=True)
+    def _ewm_time_mean_nb(values, times, halflife):
+        n = len(values)
+        result = np.empty(n)
+        level = np.nan
+        last_time = 0
+        decay_rate = np.log(2.0) / halflife
+        for i in range(n):
+            x = values[i]
+            if not np.isnan(x):
+                if np.isnan(level):
+                    level = x
+                else:
+                    alpha = np.exp(-(times[i] - last_time) * decay_rate)
+                    level = alpha * level + (1.0 - alpha) * x
+                last_time = times[i]
+            result[i] = level
+        return result
+
+
+def _as_inputs(values, windows):
+    """カーネル入力をカーネルのシグネチャどおりの連続したfloat64配列・int64配列に揃える"""
+    return np.ascontiguousarray(values, dtype=np.float64), np.ascontiguousarray(windows, dtype=np.int64)
+
+
+def rolling_mean_std(values: np.ndarray, windows) -> tuple:
+    """
+    複数ウィンドウのローリング平均・標準偏差（ddof=1）
+
+    Returns:
+        (平均, 標準偏差) いずれも (len(windows), len(values)) の配列
+    """
+    values, windows = _as_inputs(values, windows)
+    if njit is not None:
+        return _rolling_mean_std_nb(values, windows)
+
+    series = pd.Series(values)
+    means = np.array([series.rolling(window).mean().to_numpy() for window in windows])
+    stds = np.array([series.rolling(window).std().to_numpy() for window in windows])
+    return means, stds
+
+
+def rolling_skew_kurt(values: np.ndarray, windows) -> tuple:
+    """
+    複数ウィンドウのローリング歪度・尖度（pandasと同じ不偏推定）
+
+    Returns:
+        (歪度, 尖度) いずれも (len(windows), len(values)) の配列
+    """
+    values, windows = _as_inputs(values, windows)
+    if njit is not None:
+        return _rolling_skew_kurt_nb(values, windows)
+
+    series = pd.Series(values)
+    skews = np.array([series.rolling(window).skew().to_numpy() for window in windows])
+    kurts = np.array([series.rolling(window).kurt().to_numpy() for window in windows])
+    return skews, kurts
+
+
+def ewm_mean(values: np.ndarray, spans) -> np.ndarray:
+    """
+    複数スパンの指数移動平均（pandasのewm(span=...).mean()と同じ値）
+
+    Returns:
+        (len(spans), len(values)) の配列
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    spans = np.ascontiguousarray(spans, dtype=np.float64)
+    if njit is not None:
+        return _ewm_mean_nb(values, spans)
+
+    series = pd.Series(values)
+    return np.array([series.ewm(span=span).mean().to_numpy() for span in spans])
+
+
+def ewm_time_mean(values: np.ndarray, times: np.ndarray, halflife: float) -> np.ndarray:
+    """
+    不等間隔の時刻に対する半減期ベースの指数移動平均（漸化式・O(N)）
+
+    y_t = α_t * y_{t-1} + (1 - α_t) * x_t, α_t = exp(-Δt * ln2 / halflife)
+    pandasのewm(halflife, times=...)は全履歴の重み付き平均でO(N²)になるため、その代替として使う
+    欠損は直前の値を保持し、次の観測時に経過時間分まとめて減衰させる
+
+    Args:
+        values: 値
+        times: 時刻（int64、halflifeと同じ単位）
+        halflife: 半減期
+
+    Returns:
+        len(values) の配列
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    times = np.ascontiguousarray(times, dtype=np.int64)
+    if njit is not None:
+        return _ewm_time_mean_nb(values, times, float(halflife))
+
+    result = np.empty(len(values))
+    level = np.nan
+    last_time = 0
+    decay_rate = np.log(2.0) / halflife
+    for i, (x, t) in enumerate(zip(values.tolist(), times.tolist())):
+        if x == x:
+            if level != level:
+                level = x
+            else:
+                alpha = np.exp(-(t - last_time) * decay_rate)
+                level = alpha * level + (1.0 - alpha) * x
+            last_time = t
+        result[i] = level
+    return result
+
+
+def on_balance_volume(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    OBV（On Balance Volume）
+
+    (sign(close.diff()) * volume).fillna(0).cumsum() と同じ値を返す
+
+    Returns:
+        len(close) の配列
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    volume = np.ascontiguousarray(volume, dtype=np.float64)
+    if njit is not None:
+        return _on_balance_volume_nb(close, volume)
+
+    signed = np.zeros(len(close))
+    if len(close) > 1:
+        signed[1:] = np.sign(np.diff(close)) * volume[1:]
+    return np.cumsum(np.nan_to_num(signed, nan=0.0))
+
+
+def rolling_mad(values: np.ndarray, windows) -> np.ndarray:
+    """
+    複数ウィンドウのローリング平均絶対偏差（CCI用）
+
+    Returns:
+        (len(windows), len(values)) の配列
+    """
+    values, windows = _as_inputs(values, windows)
+    if njit is not None:
+        return _rolling_mad_nb(values, windows)
+
+    # numbaがない場合もウィンドウごとのPythonコールバックは使わず、ストライドビューでまとめて計算
+    result = np.full((len(windows), len(values)), np.nan)
+    for j, window in enumerate(windows):
+        if len(values) >= window:
+            view = sliding_window_view(values, window)
+            result[j, window - 1:] = np.abs(view - view.mean(axis=1, keepdims=True)).mean(axis=1)
+    return result
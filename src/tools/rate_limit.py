@@ -0,0 +1,59 @@
+"""
+APIリクエストのレート制御
+
+複数スレッドから同じAPIを呼ぶ場合でも、リクエスト間隔を一定以上に保つ
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    """スレッド間で共有するリクエスト間隔制御（1リクエスト/interval秒）"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        """次のリクエスト枠まで待機"""
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class TokenBucket:
+    """
+    スレッド間で共有するトークンバケット（平均rate_per_secリクエスト/秒、最大burst件まで連続可）
+
+    RateLimiterと異なり、しばらく呼ばれなかった後はburst件まで待たずに送れる
+    """
+
+    def __init__(self, rate_per_sec: float, burst: int):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def acquire(self):
+        """トークンを1つ取得（不足していれば補充されるまで待機）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 先にトークンを予約し、不足分が補充されるまでの時間だけロック外で待つ
+            self._tokens -= 1
+            wait_time = -self._tokens / self.rate
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+# 接続先ホストごとに共有するバケット（同じホストを呼ぶモジュール・インスタンス間で共有）
+YAHOO_BUCKET = TokenBucket(5, 10)
+OANDA_BUCKET = TokenBucket(2, 4)
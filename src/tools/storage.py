@@ -0,0 +1,155 @@
+"""
+収集データの保存・読み込み
+
+時間足のOHLCVはCSVだと書き込み・数値の解析が重いため、Parquet（Snappy圧縮）で保存する
+（DatetimeIndexも型を保ったまま復元される）
+パイプライン内で直後に読み直す一時的な受け渡しには、読み込みの速いFeather（Arrow IPC、LZ4圧縮）も使える
+"""
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from loguru import logger
+
+PARQUET_OPTIONS = {"engine": "pyarrow", "compression": "snappy", "index": True}
+FEATHER_OPTIONS = {"compression": "lz4"}
+# 保存形式ごとの拡張子
+SUFFIXES = {"parquet": ".parquet", "feather": ".feather"}
+# float32で保存する価格列（為替レートは有効数字6〜7桁で足りる）
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+
+def downcast_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    OHLCの価格列をfloat32に変換（出来高などその他の列はそのまま）
+
+    Parquetはfloat32のまま保存・復元するため、ディスク・メモリとも価格列が半分になる
+    """
+    for col in PRICE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32", copy=False)
+    return df
+
+
+def save_frame(df: pd.DataFrame, path: Union[str, Path], file_format: str = "parquet") -> Path:
+    """
+    DataFrameをParquetまたはFeatherで保存
+
+    Args:
+        df: 保存するDataFrame
+        path: 保存先のパス（拡張子は形式に合わせて置き換える）
+        file_format: parquet（長期保存用）または feather（パイプライン内の受け渡し用）
+
+    Returns:
+        保存先のパス
+    """
+    if file_format not in SUFFIXES:
+        raise ValueError(f"未対応の保存形式: {file_format}")
+
+    path = Path(path).with_suffix(SUFFIXES[file_format])
+    if file_format == "feather":
+        # DataFrame.to_featherは既定以外のインデックスを保存できないため、pyarrowで書き込む
+        # （DatetimeIndexはpandasメタデータとして保存され、読み込み時に復元される）
+        feather.write_feather(df, path, **FEATHER_OPTIONS)
+    else:
+        df.to_parquet(path, **PARQUET_OPTIONS)
+    return path
+
+
+def load_frame(
+    path: Union[str, Path],
+    index_col: Union[int, str] = 0,
+    memory_map: bool = True,
+    columns: Optional[List[str]] = None,
+    date_range: Optional[Tuple[str, str]] = None,
+    file_format: str = "auto"
+) -> Optional[pd.DataFrame]:
+    """
+    save_frameで保存したDataFrameを読み込み
+
+    ParquetもFeatherもない場合は同名の旧形式CSVを読み込む
+
+    Args:
+        path: 保存先のパス
+        index_col: CSVを読み込む場合のインデックス列
+        memory_map: Parquet・Featherをメモリマップで開くか
+            （ファイル全体をバッファに読み込まず、OSのページキャッシュから必要な部分だけ参照する）
+        columns: 読み込む列（Noneなら全列、インデックスは常に復元）
+        date_range: (開始, 終了) インデックスの日時で絞り込む範囲（両端を含む）
+            Parquetでは列・行グループ単位で読み込み時に絞り込み、不要な部分は読まない
+        file_format: auto（両方あれば更新日時の新しい方）・parquet・feather
+
+    Returns:
+        DataFrame（いずれのファイルもなければNone）
+    """
+    path = Path(path)
+    if file_format == "auto":
+        candidates = [path.with_suffix(suffix) for suffix in SUFFIXES.values()]
+        existing = [candidate for candidate in candidates if candidate.exists()]
+        if existing:
+            path = max(existing, key=lambda candidate: candidate.stat().st_mtime)
+        else:
+            path = path.with_suffix(".parquet")
+    elif file_format in SUFFIXES:
+        path = path.with_suffix(SUFFIXES[file_format])
+    else:
+        raise ValueError(f"未対応の保存形式: {file_format}")
+
+    if path.exists() and path.suffix == ".feather":
+        if columns is not None:
+            # Featherは列を指定するとインデックス列が含まれないため、明示的に加える
+            with pa.memory_map(str(path)) as source:
+                index_columns = pa.ipc.open_file(source).schema.pandas_metadata["index_columns"]
+            columns = list(columns) + [name for name in index_columns if isinstance(name, str)]
+        table = feather.read_table(path, columns=columns, memory_map=memory_map)
+        df = table.to_pandas(split_blocks=True, self_destruct=True, use_threads=True)
+        return _slice_dates(df, date_range)
+
+    if path.exists():
+        filters = None
+        if date_range is not None:
+            index_name, index_type = _index_field(path)
+            start, end = (_as_timestamp(value, getattr(index_type, "tz", None)) for value in date_range)
+            filters = [(index_name, ">=", start), (index_name, "<=", end)]
+
+        table = pq.read_table(
+            path, columns=columns, filters=filters, memory_map=memory_map, use_pandas_metadata=True
+        )
+        # 列ごとに別ブロックで変換し、変換済みの列からArrow側のメモリを解放してピークメモリを抑える
+        return table.to_pandas(split_blocks=True, self_destruct=True, use_threads=True)
+
+    csv_path = path.with_suffix(".csv")
+    if csv_path.exists():
+        logger.debug(f"旧形式のCSVを読み込み: {csv_path}")
+        df = pd.read_csv(csv_path, index_col=index_col, parse_dates=True)
+        if columns is not None:
+            df = df[columns]
+        return _slice_dates(df, date_range)
+
+    return None
+
+
+def _slice_dates(df: pd.DataFrame, date_range: Optional[Tuple[str, str]]) -> pd.DataFrame:
+    """読み込み後のDataFrameをインデックスの日時で絞り込む（両端を含む）"""
+    if date_range is None:
+        return df
+    start, end = (_as_timestamp(value, getattr(df.index, "tz", None)) for value in date_range)
+    return df.loc[start:end]
+
+
+def _index_field(path: Path) -> Tuple[str, pa.DataType]:
+    """Parquetに保存されたインデックス列の (列名, 型) を取得"""
+    schema = pq.read_schema(path)
+    index_name = schema.pandas_metadata["index_columns"][0]
+    return index_name, schema.field(index_name).type
+
+
+def _as_timestamp(value, tz) -> pd.Timestamp:
+    """絞り込み条件の日時をインデックスのタイムゾーンに揃える"""
+    timestamp = pd.Timestamp(value)
+    if tz is None:
+        return timestamp.tz_localize(None) if timestamp.tzinfo is not None else timestamp
+    return timestamp.tz_localize(tz) if timestamp.tzinfo is None else timestamp.tz_convert(tz)